@@ -0,0 +1,229 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Length in minutes of the intraday candle periods served by the historical-chart endpoint
+PERIOD_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '1hour': 60, '4hour': 240}
+
+STATEMENT_ENDPOINTS = {'income-statement', 'balance-sheet-statement', 'cash-flow-statement', 'key-metrics',
+                       'ratios', 'enterprise-values', 'financial-growth'}
+
+
+def _price(symbol, timestamp):
+    # Deterministic synthetic price of a symbol at a time
+    seed = zlib.crc32(symbol.encode()) % 1000
+    return round(50 + seed / 10 + 5 * math.sin(timestamp / 50000 + seed), 4)
+
+
+def make_candles(symbol, period, start, end, limit=None):
+    """
+    Description
+    ----
+    Return synthetic FMP candles of a symbol between two dates (formated as %Y-%m-%d), newest first.
+    Intraday candles cover the 9:30-16:00 session of the week days. Only the limit newest candles are built.
+    """
+    first_day = datetime.strptime(start, '%Y-%m-%d')
+    day = datetime.strptime(end, '%Y-%m-%d')
+    candles = []
+    while day >= first_day and (limit is None or len(candles) < limit):
+        if day.weekday() < 5:
+            if period == '1d':
+                times = [day]
+            else:
+                step = timedelta(minutes=PERIOD_MINUTES[period])
+                times, time_ = [], day.replace(hour=9, minute=30)
+                while time_ < day.replace(hour=16):
+                    times.append(time_)
+                    time_ += step
+            for time_ in reversed(times):
+                price = _price(symbol, time_.timestamp())
+                candles.append({'date': time_.strftime('%Y-%m-%d' if period == '1d' else '%Y-%m-%d %H:%M:%S'),
+                                'open': price, 'low': round(price * 0.995, 4), 'high': round(price * 1.005, 4),
+                                'close': round(price * 1.001, 4), 'volume': 1000 + int(price * 10)})
+        day -= timedelta(days=1)
+    return candles[:limit]
+
+
+def make_quote(symbol):
+    price = _price(symbol, time.time())
+    return {'symbol': symbol, 'name': f'{symbol} Inc.', 'price': price, 'changesPercentage': 0.1,
+            'change': 0.05, 'dayLow': price * 0.99, 'dayHigh': price * 1.01, 'marketCap': int(price * 10 ** 9),
+            'exchange': 'NASDAQ', 'volume': 10 ** 6, 'avgVolume': 10 ** 6, 'open': price, 'previousClose': price,
+            'timestamp': int(time.time())}
+
+
+def make_profiles_csv(count):
+    """Return the CSV of the bulk profile endpoint, like FMP most companies have no website (sparse text column)"""
+    lines = ['symbol,price,volAvg,exchange,website,ipoDate']
+    for i in range(count):
+        symbol = f'S{i:04d}'
+        website = f'https://www.{symbol.lower()}.com' if i % 10 == 9 else ''
+        price = _price(symbol, 0)
+        lines.append(f'{symbol},{price},{1000 + i},{"NASDAQ" if i % 2 else "NYSE"},{website},2000-01-{i % 28 + 1:02d}')
+    return '\n'.join(lines) + '\n'
+
+
+def make_statements(symbol, limit):
+    year = datetime.now().year - 1
+    return [{'date': f'{year - i}-12-31', 'symbol': symbol, 'reportedCurrency': 'USD', 'calendarYear': str(year - i),
+             'period': 'FY', 'revenue': 10 ** 9 + i, 'netIncome': 10 ** 8 + i, 'grossProfitRatio': 0.4,
+             'eps': 1.5, 'link': None} for i in range(limit)]
+
+
+class MockFmpServer:
+    """
+    Description
+    ----
+    Local HTTP server serving synthetic FMP-shaped payloads, used to benchmark fmpy without the network.
+    Serves the historical-chart, historical-price-full, quote, quote-short, statement and bulk profile endpoints.
+
+    Input
+    ----
+    latency (float)
+        Number of seconds each response is delayed (0 by default)
+    jitter (float)
+        Maximum random number of seconds added to the latency (0 by default)
+    max_rows (integer)
+        Maximum number of candles of a historical response, the newest candles are kept like FMP (5000 by default)
+    bulk_rows (integer)
+        Number of rows of the bulk CSV responses (100 by default)
+    error_rate (float)
+        Share of the requests answered by an injected 429 or 5xx error (0 by default)
+    retry_after (integer)
+        Retry-After header of the injected 429 errors (0 by default)
+    seed (integer)
+        Seed of the latency jitter and error injection
+    port (integer)
+        Port of the server (0 by default, a free port is picked)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, max_rows=5000, error_rate=0.0, retry_after=0, seed=0, port=0,
+                 bulk_rows=100):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_rows = max_rows
+        self.bulk_rows = bulk_rows
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-fmp-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _draw(self):
+        # Return the delay and the injected error status of a request
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            status = None
+            if self._random.random() < self.error_rate:
+                status = self._random.choice([429, 500, 502, 503, 504])
+                self.errors += 1
+        return delay, status
+
+    def get_payload(self, path, query):
+        """Return the payload of a request path, None for an unknown endpoint"""
+        parts = [part for part in path.split('/') if part]
+        if len(parts) < 3:
+            return None
+        endpoint, args = parts[2], parts[3:]
+        today = datetime.now().strftime('%Y-%m-%d')
+        if endpoint == 'historical-chart' and len(args) == 2 and args[0] in PERIOD_MINUTES:
+            start = query.get('from', [(datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')])[0]
+            return make_candles(args[1], args[0], start, query.get('to', [today])[0], self.max_rows)
+        elif endpoint == 'historical-price-full' and len(args) == 1:
+            start = query.get('from', [(datetime.now() - timedelta(days=5 * 365)).strftime('%Y-%m-%d')])[0]
+            return {'symbol': args[0],
+                    'historical': make_candles(args[0], '1d', start, query.get('to', [today])[0], self.max_rows)}
+        elif endpoint in ('quote', 'quote-short') and len(args) == 1:
+            quotes = [make_quote(symbol) for symbol in args[0].split(',')]
+            if endpoint == 'quote-short':
+                quotes = [{'symbol': quote['symbol'], 'price': quote['price'], 'volume': quote['volume']}
+                          for quote in quotes]
+            return quotes
+        elif endpoint in STATEMENT_ENDPOINTS and len(args) == 1:
+            return make_statements(args[0], int(query.get('limit', ['5'])[0]))
+        elif endpoint == 'profile' and args == ['all']:
+            return make_profiles_csv(self.bulk_rows)
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                delay, status = server._draw()
+                if delay:
+                    time.sleep(delay)
+                parts = urlsplit(self.path)
+                payload = None if status else server.get_payload(parts.path, parse_qs(parts.query))
+                if status is None and payload is None:
+                    status = 404
+                csv = isinstance(payload, str)
+                body = payload.encode() if csv else \
+                    json.dumps(payload if status is None else {'Error Message': 'Injected error'}).encode()
+                self.send_response(status or 200)
+                self.send_header('Content-Type', 'text/csv' if csv else 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if status == 429:
+                    self.send_header('Retry-After', str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a mock FMP server serving synthetic payloads')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random latency added in seconds')
+    parser.add_argument('--max-rows', type=int, default=5000, help='maximum number of candles by response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of injected 429/5xx responses')
+    parser.add_argument('--retry-after', type=int, default=0, help='Retry-After header of the injected 429')
+    args = parser.parse_args(argv)
+    server = MockFmpServer(latency=args.latency, jitter=args.jitter, max_rows=args.max_rows,
+                           error_rate=args.error_rate, retry_after=args.retry_after, port=args.port)
+    print(f'Mock FMP server listening on {server.url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmarks of fmpy against a local mock FMP server (see mock_server.py), so that the client overhead is measured
+without the network variance.
+
+Usage:
+    python benchmarks/run.py
+    python benchmarks/run.py --latency 0.02 --error-rate 0.01 --output results.json
+    python benchmarks/run.py --baseline results.json  # Exit with an error when a throughput regressed
+
+The mock server shares the GIL of the benchmarked client when it runs in the same process. It can be started
+in its own process instead (python benchmarks/mock_server.py --port 8000) and used with --server-url.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from fmpy import frames  # noqa: E402
+from fmpy.client import FmpClient  # noqa: E402
+from fmpy.rate_limit import TokenBucketLimiter  # noqa: E402
+from mock_server import MockFmpServer, make_candles, make_statements  # noqa: E402
+# fmpy imports pandas lazily, it is imported up front so that the first benchmark does not pay for it
+import pandas  # noqa: E402,F401
+
+
+def _latency_stats(metrics):
+    # Mean and 95th percentile (upper bound of its histogram bucket) of the request latencies
+    snapshot = metrics.snapshot()
+    count = sum(endpoint['latency']['count'] for endpoint in snapshot.values())
+    if not count:
+        return {'requests': 0, 'latency_mean': None, 'latency_p95': None, 'retries': 0}
+    total = sum(endpoint['latency']['sum'] for endpoint in snapshot.values())
+    buckets = {}
+    for endpoint in snapshot.values():
+        for bucket, cumulative in endpoint['latency']['buckets'].items():
+            buckets[bucket] = buckets.get(bucket, 0) + cumulative
+    p95 = next(bucket for bucket, cumulative in buckets.items() if cumulative >= 0.95 * count)
+    p95 = float('inf') if p95 == '+Inf' else p95
+    return {'requests': count, 'latency_mean': total / count, 'latency_p95': p95,
+            'retries': sum(endpoint['retries'] for endpoint in snapshot.values())}
+
+
+def _measure(name, func, items_name):
+    started = time.perf_counter()
+    items = func()
+    seconds = time.perf_counter() - started
+    return {'name': name, 'seconds': seconds, 'items': items, 'unit': items_name,
+            'throughput': items / seconds if seconds else float('inf')}
+
+
+def _make_client(server, args):
+    return FmpClient(api_key='benchmark', base_url=args.server_url or server.url, timeout=30, request_retry=args.retries,
+                     pool_maxsize=args.workers * 2, rate_limiter=TokenBucketLimiter(10 ** 9, burst=10 ** 8))
+
+
+def bench_historical(server, args, mode):
+    client = _make_client(server, args)
+    end = datetime.now() - timedelta(days=1)
+    start = end - timedelta(days=args.days)
+
+    def run():
+        df = client.get_historical_data('BENCH', period='1m', start=start.strftime('%Y-%m-%d'),
+                                        end=end.strftime('%Y-%m-%d'), mode=mode, max_workers=args.workers)
+        return 0 if df is None else len(df)
+
+    result = _measure(f'historical_{mode}', run, 'candles')
+    result.update(_latency_stats(client.metrics))
+    client.disconnect()
+    return result
+
+
+def bench_historical_many(server, args):
+    client = _make_client(server, args)
+    end = datetime.now() - timedelta(days=1)
+    start = end - timedelta(days=args.days)
+    symbols = [f'S{i:04d}' for i in range(args.workers * 4)]
+
+    def run():
+        data, errors = client.get_historical_data_many(symbols, period='5m', start=start.strftime('%Y-%m-%d'),
+                                                       end=end.strftime('%Y-%m-%d'), max_workers=args.workers)
+        return sum(len(df) for df in data.values() if df is not None)
+
+    result = _measure('historical_many', run, 'candles')
+    result.update(_latency_stats(client.metrics))
+    client.disconnect()
+    return result
+
+
+def bench_quotes(server, args):
+    client = _make_client(server, args)
+    symbols = [f'S{i:04d}' for i in range(args.symbols)]
+
+    def run():
+        return len(client.get_symbols_info(symbols, max_workers=args.workers))
+
+    result = _measure('quotes_bulk', run, 'quotes')
+    result.update(_latency_stats(client.metrics))
+    client.disconnect()
+    return result
+
+
+def bench_conversion(args):
+    end = datetime.now() - timedelta(days=1)
+    candles = make_candles('BENCH', '1min', (end - timedelta(days=args.days)).strftime('%Y-%m-%d'),
+                           end.strftime('%Y-%m-%d'))[::-1]
+
+    def run():
+        for _ in range(args.rounds):
+            FmpClient._convert_raw_data_to_df(candles, datetime_index=True)
+        return len(candles) * args.rounds
+
+    return _measure('dataframe_conversion', run, 'candles')
+
+
+def bench_records_to_frame(args):
+    records = [record for i in range(args.symbols) for record in make_statements(f'S{i:04d}', 20)]
+
+    def run():
+        schema = {}
+        for _ in range(args.rounds):
+            frames.records_to_frame(records, schema)
+        return len(records) * args.rounds
+
+    return _measure('records_to_frame', run, 'records')
+
+
+def bench_rate_limiter(args):
+    limiter = TokenBucketLimiter(10 ** 9, burst=10 ** 8)
+
+    def run():
+        calls = 100000 * args.rounds
+        for _ in range(calls):
+            limiter.acquire()
+        return calls
+
+    return _measure('rate_limiter', run, 'calls')
+
+
+def bench_import(args):
+    # Import time of fmpy.client in a fresh interpreter, minus the interpreter start up time
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([src, os.environ.get('PYTHONPATH', '')])}
+
+    def run_python(code):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, env=env)
+        return time.perf_counter() - started
+
+    rounds = max(args.rounds, 3)
+    start_up = min(run_python('pass') for _ in range(rounds))
+    seconds = max(min(run_python('import fmpy.client') for _ in range(rounds)) - start_up, 1e-6)
+    loaded = subprocess.run([sys.executable, '-c', 'import sys, fmpy.client; print("pandas" in sys.modules)'],
+                            check=True, env=env, capture_output=True, text=True).stdout.strip()
+    return {'name': 'import_client', 'seconds': seconds, 'items': 1, 'unit': 'imports', 'throughput': 1 / seconds,
+            'pandas_imported': loaded == 'True'}
+
+
+def compare(results, baseline, tolerance):
+    """Return the benchmarks whose throughput is lower than the baseline one by more than tolerance"""
+    baseline = {result['name']: result for result in baseline}
+    return [(result['name'], baseline[result['name']]['throughput'], result['throughput'])
+            for result in results if result['name'] in baseline
+            and result['throughput'] < baseline[result['name']]['throughput'] * (1 - tolerance)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark fmpy against a local mock FMP server')
+    parser.add_argument('--latency', type=float, default=0.005, help='server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random latency added in seconds')
+    parser.add_argument('--max-rows', type=int, default=5000, help='maximum number of candles by response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of injected 429/5xx responses')
+    parser.add_argument('--server-url', help='url of a mock server started separately, its options are ignored')
+    parser.add_argument('--retries', type=int, default=5, help='request retries of the client')
+    parser.add_argument('--days', type=int, default=60, help='number of days of historical candles')
+    parser.add_argument('--symbols', type=int, default=2000, help='number of symbols of the quote benchmark')
+    parser.add_argument('--workers', type=int, default=8, help='number of concurrent requests')
+    parser.add_argument('--rounds', type=int, default=5, help='rounds of the local benchmarks')
+    parser.add_argument('--output', help='write the results to a JSON file')
+    parser.add_argument('--baseline', help='JSON results to compare the throughputs with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='throughput drop allowed by the baseline')
+    args = parser.parse_args(argv)
+
+    results = [bench_import(args)]
+    with MockFmpServer(latency=args.latency, jitter=args.jitter, max_rows=args.max_rows,
+                       error_rate=args.error_rate) as server:
+        results.append(bench_historical(server, args, 'cursor'))
+        results.append(bench_historical(server, args, 'parallel'))
+        results.append(bench_historical_many(server, args))
+        results.append(bench_quotes(server, args))
+    results.append(bench_conversion(args))
+    results.append(bench_records_to_frame(args))
+    results.append(bench_rate_limiter(args))
+
+    print(f'{"benchmark":<22}{"seconds":>10}{"throughput":>22}{"requests":>10}{"mean ms":>10}{"p95 ms":>10}{"retries":>10}')
+    for result in results:
+        latency = [f'{result[key] * 1000:.1f}' if result.get(key) is not None else '-'
+                   for key in ('latency_mean', 'latency_p95')]
+        print(f'{result["name"]:<22}{result["seconds"]:>10.3f}{result["throughput"]:>14.0f} {result["unit"]:<7}'
+              f'{result.get("requests", "-"):>10}{latency[0]:>10}{latency[1]:>10}{result.get("retries", "-"):>10}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f'Regression in {name}: {before:.0f} -> {after:.0f} per second')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
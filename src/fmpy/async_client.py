@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import itertools
+import types
+from concurrent.futures import ThreadPoolExecutor
+from .client import FmpClient
+
+
+class AsyncFmpClient:
+    """
+    Description
+    ----
+    Asyncio counterpart of FmpClient. Every public FmpClient method is exposed as a coroutine
+    (for example: await client.get_company_profile('AAPL')), the iter_* methods as async iterators.
+    The chunks returned by the get_bulk_* methods with a chunksize are iterated with async for.
+    Requests run on a bounded pool of worker threads sharing one HTTP connection pool and the
+    rate limit budget of the underlying FmpClient.
+
+    Input
+    ----
+    api_key (string)
+        FMP API key (the FMP_API_KEY environment variable is used if not provided)
+    rate_limit (integer)
+        Number of call per minute tolerance (300 by default)
+    timeout (integer)
+        Number of seconds to wait a request before raising a timeout (5 by default)
+    request_retry (integer)
+        Number of request retries before abording (5 by default)
+    max_concurrency (integer)
+        Maximum number of requests in flight at the same time (100 by default)
+    client (FmpClient)
+        Existing FmpClient to wrap. Its rate limit budget is then shared with the synchronous code using it
+    """
+
+    _sync_only_methods = ['connect', 'disconnect', 'check_rate_limit', 'make_params', 'watch',
+                          'retry_stats']
+    # Number of records pulled from a synchronous iterator by each worker thread hop
+    _iter_batch_size = 1000
+
+    def __init__(self, api_key=None, rate_limit=300, timeout=5, request_retry=5, max_concurrency=100, client=None):
+        if client is None:
+            client = FmpClient(api_key=api_key, rate_limit=rate_limit, timeout=timeout,
+                               request_retry=request_retry, pool_maxsize=max_concurrency)
+        self.client = client
+        self._max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fmpy')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def watch(self, symbols, interval=1.0, callback=None):
+        """
+        Description
+        ----
+        Watch the real time quotes of a list of assets (see FmpClient.watch).
+        The returned Watch is consumed with: async for changes in watch
+
+        Output
+        ----
+        watch (Watch)
+            Subscription to close to stop watching
+        """
+        return self.client.watch(symbols, interval=interval, callback=callback)
+
+    async def close(self):
+        # The requests in flight are waited for on another thread, the event loop keeps running meanwhile
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.client.disconnect()
+
+
+async def _iterate(client, iterator, batch_size):
+    # Pull the items of a synchronous iterator on the worker threads, batch_size items by thread hop,
+    # so that its blocking reads never run on the event loop
+    while True:
+        items = await client._run(list, itertools.islice(iterator, batch_size))
+        if not items:
+            return
+        for item in items:
+            yield item
+
+
+def _make_async_method(name):
+    method = getattr(FmpClient, name)
+
+    @functools.wraps(method)
+    async def async_method(self, *args, **kwargs):
+        result = await self._run(getattr(self.client, name), *args, **kwargs)
+        if isinstance(result, types.GeneratorType):
+            # Chunks of a streamed response (get_bulk_* with a chunksize), each one is already large
+            return _iterate(self, result, 1)
+        return result
+
+    return async_method
+
+
+def _make_async_iterator(name):
+    method = getattr(FmpClient, name)
+
+    @functools.wraps(method)
+    async def async_iterator(self, *args, **kwargs):
+        async for item in _iterate(self, getattr(self.client, name)(*args, **kwargs), self._iter_batch_size):
+            yield item
+
+    return async_iterator
+
+
+for _name, _attr in vars(FmpClient).items():
+    if not _name.startswith('_') and callable(_attr) and _name not in AsyncFmpClient._sync_only_methods:
+        if _name.startswith('iter_'):
+            setattr(AsyncFmpClient, _name, _make_async_iterator(_name))
+        else:
+            setattr(AsyncFmpClient, _name, _make_async_method(_name))
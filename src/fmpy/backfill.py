@@ -0,0 +1,297 @@
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from . import utils
+from .client import FmpClient
+from .store import CandleStore
+
+pd = utils.lazy_import('pandas')
+
+
+class BackfillJournal:
+    """
+    Description
+    ----
+    SQLite journal of a backfill: every downloaded (symbol, window) and every symbol merged into the
+    candle store is recorded, so that a restarted backfill skips the finished work.
+    The journal can be shared by several processes.
+
+    Input
+    ----
+    path (string)
+        Path of the SQLite file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            # Windows only depend on the backfill start (see _plan_windows), a backfill started again with
+            # another end date finds the windows downloaded before
+            self._connection.execute('CREATE TABLE IF NOT EXISTS windows (symbol TEXT, period TEXT, window_start TEXT, '
+                                     'window_end TEXT, rows INTEGER, completed REAL, '
+                                     'PRIMARY KEY (symbol, period, window_start, window_end))')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS symbols (symbol TEXT, period TEXT, start TEXT, '
+                                     'end TEXT, rows INTEGER, completed REAL, PRIMARY KEY (symbol, period, start, end))')
+
+    def get_completed_windows(self, symbol, period):
+        with self._lock:
+            rows = self._connection.execute('SELECT window_start, window_end FROM windows WHERE symbol = ? AND '
+                                            'period = ?', (symbol, period)).fetchall()
+        return {tuple(row) for row in rows}
+
+    def complete_window(self, symbol, period, window, rows):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?, ?)',
+                                     (symbol, period, window[0], window[1], rows, time.time()))
+
+    def is_symbol_completed(self, symbol, period, start, end):
+        with self._lock:
+            return self._connection.execute('SELECT 1 FROM symbols WHERE symbol = ? AND period = ? AND start = ? '
+                                            'AND end = ?', (symbol, period, start, end)).fetchone() is not None
+
+    def complete_symbol(self, symbol, period, start, end, rows):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO symbols VALUES (?, ?, ?, ?, ?, ?)',
+                                     (symbol, period, start, end, rows, time.time()))
+
+    def close(self):
+        self._connection.close()
+
+
+def _get_window_file(output, period, symbol, window):
+    return os.path.join(output, '_backfill', period, symbol, f'{window[0]}_{window[1]}.parquet')
+
+
+def _plan_windows(period, start, end):
+    # Split [start, end] into windows of HISTORICAL_WINDOW_DAYS days counted from the start day, oldest first.
+    # Only the last window depends on the end date, so that an interrupted backfill started again later (with
+    # today as end date for example) plans the same windows
+    window_days = FmpClient.HISTORICAL_WINDOW_DAYS[period]
+    window_start = datetime.strptime(start.split(' ')[0], '%Y-%m-%d')
+    last_day = datetime.strptime(end.split(' ')[0], '%Y-%m-%d')
+    windows = []
+    while window_start <= last_day:
+        window_end = min(window_start + timedelta(days=window_days - 1), last_day)
+        windows.append((window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')))
+        window_start += timedelta(days=window_days)
+    return windows
+
+
+def _download_window(client, symbol, period, window, output):
+    # Download a window and stage its candles in a Parquet file, merged into the store with the other windows
+    # of the symbol once they are all downloaded. The whole window is staged so that it does not depend on the
+    # backfill range
+    data = client._get_window_historical_data(symbol, period, *window)
+    if not data:
+        return 0
+    df = client._convert_raw_data_to_df(data[::-1], True).sort_index()
+    file = _get_window_file(output, period, symbol, window)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    CandleStore._replace(file, lambda tmp_file: df.reset_index().to_parquet(tmp_file, index=False))
+    return len(df)
+
+
+def _merge_symbol(store, symbol, period, start, end, windows, output):
+    frames = [pd.read_parquet(file).set_index('Date') for file in
+              (_get_window_file(output, period, symbol, window) for window in windows) if os.path.exists(file)]
+    df = None
+    if frames:
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep='last')]
+    # Like FmpClient.get_historical_data, the stored coverage never goes beyond the current time
+    end = min(end, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    if start <= end:
+        store.write(symbol, period, df, start, end)
+    for window in windows:
+        file = _get_window_file(output, period, symbol, window)
+        if os.path.exists(file):
+            os.remove(file)
+    directory = os.path.join(output, '_backfill', period, symbol)
+    if os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+    return 0 if df is None else len(df)
+
+
+def _backfill_shard(symbols, period, start, end, output, journal_path, threads, client_kwargs, verbose):
+    # Backfill the symbols of one process: the windows of all its symbols are downloaded by a pool of threads,
+    # a symbol is merged into the candle store as soon as its last window is downloaded
+    client = FmpClient(**client_kwargs)
+    store = CandleStore(output)
+    journal = BackfillJournal(journal_path)
+    summary = {'symbols': 0, 'skipped_symbols': 0, 'windows': 0, 'skipped_windows': 0, 'candles': 0, 'errors': {}}
+    windows_by_symbol = {}
+    remaining = {}
+
+    def merge(symbol):
+        rows = _merge_symbol(store, symbol, period, start, end, windows_by_symbol[symbol], output)
+        journal.complete_symbol(symbol, period, start, end, rows)
+        summary['symbols'] += 1
+        summary['candles'] += rows
+        if verbose:
+            print(f'{symbol}: {rows} candles')
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = {}
+            for symbol in symbols:
+                if journal.is_symbol_completed(symbol, period, start, end):
+                    summary['skipped_symbols'] += 1
+                    continue
+                windows = _plan_windows(period, start, end)
+                completed = journal.get_completed_windows(symbol, period)
+                pending = [window for window in windows if window not in completed]
+                summary['skipped_windows'] += len(windows) - len(pending)
+                windows_by_symbol[symbol] = windows
+                remaining[symbol] = len(pending)
+                for window in pending:
+                    future = executor.submit(_download_window, client, symbol, period, window, output)
+                    futures[future] = (symbol, window)
+            # Symbols whose windows were all downloaded by a previous run are only merged
+            for symbol in [symbol for symbol, count in remaining.items() if count == 0]:
+                merge(symbol)
+            for future in as_completed(futures):
+                symbol, window = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as error:
+                    # The symbol is not merged, the next run downloads its missing windows
+                    summary['errors'][f'{symbol} {window[0]} {window[1]}'] = repr(error)
+                    remaining[symbol] = None
+                    continue
+                # A window reaching today may still get new candles, it is downloaded again by the next run
+                if window[1] < datetime.now().strftime('%Y-%m-%d'):
+                    journal.complete_window(symbol, period, window, rows)
+                summary['windows'] += 1
+                if remaining[symbol] is not None:
+                    remaining[symbol] -= 1
+                    if remaining[symbol] == 0:
+                        merge(symbol)
+    finally:
+        journal.close()
+        client.disconnect()
+    return summary
+
+
+def backfill(symbols, period, start, end, output, journal=None, processes=1, threads=8, api_key=None,
+             rate_limit=300, timeout=5, request_retry=5, base_url=None, verbose=False):
+    """
+    Description
+    ----
+    Download the historical candles of a list of symbols into a candle store (Parquet files readable with
+    FmpClient(candle_store=output)). The range of each symbol is split into windows downloaded concurrently,
+    the symbols are sharded across processes. Every downloaded window is recorded in a journal, an
+    interrupted backfill started again with the same start date (and any end date) only downloads the missing
+    windows.
+
+    Input
+    ----
+    symbols (list)
+        A list of assets (for example: ["TSLA", "AAPL"])
+    period (string)
+        Candlestick period. Can be '1m', '5m', '15m', '30m', '1h', '4h', '1d'
+    start (string)
+        Start date (formated as %Y-%m-%d or %Y-%m-%d %H:%M:%S)
+    end (string)
+        End date (formated as %Y-%m-%d or %Y-%m-%d %H:%M:%S), the whole end day is included
+    output (string)
+        Root directory of the candle store
+    journal (string)
+        Path of the SQLite journal (output/_backfill.sqlite by default)
+    processes (integer)
+        Number of processes, each one handles a share of the symbols (1 by default)
+    threads (integer)
+        Number of windows downloaded at the same time by each process (8 by default)
+    api_key (string)
+        FMP API key (the FMP_API_KEY environment variable is used if not provided)
+    rate_limit (integer)
+        Number of call per minute tolerance, shared by all the processes (300 by default)
+    timeout (integer)
+        Number of seconds to wait a request before raising a timeout (5 by default)
+    request_retry (integer)
+        Number of request retries before abording (5 by default)
+    base_url (string)
+        Server the requests are sent to instead of the FMP server (see FmpClient)
+    verbose (bool)
+        Print each symbol once it is stored
+
+    Output
+    ----
+    summary (dict)
+        Number of symbols and windows downloaded or skipped, number of candles stored and the error of each
+        failed window (its symbol is downloaded again by the next run)
+    """
+    if period not in ['1m', '5m', '15m', '30m', '1h', '4h', '1d']:
+        raise ValueError(f'{period} period is not allow (allowed periods are 1m,5m,15m,30m,1h,4h,1d)')
+    _start = f'{start} 00:00:00' if len(start.split(' ')) == 1 else start
+    _end = f'{end} 23:59:59' if len(end.split(' ')) == 1 else end
+    for date in [_start, _end]:
+        if not utils.is_valid_time_format(date):
+            raise ValueError(f'{date} as a wrong date format')
+    os.makedirs(output, exist_ok=True)
+    journal = journal or os.path.join(output, '_backfill.sqlite')
+    # Creates the journal tables once before the processes use it
+    BackfillJournal(journal).close()
+    processes = max(min(processes, len(symbols)), 1)
+    # Each process has its own limiter, the rate limit is split between them
+    process_rate_limit = max(rate_limit // processes, 2)
+    client_kwargs = {'api_key': api_key, 'rate_limit': process_rate_limit, 'timeout': timeout,
+                     'request_retry': request_retry, 'pool_maxsize': threads, 'base_url': base_url}
+    shards = [symbols[i::processes] for i in range(processes)]
+    args = (utils.format_period(period), _start, _end, output, journal, threads, client_kwargs, verbose)
+    if processes == 1:
+        summaries = [_backfill_shard(shards[0], *args)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            summaries = list(executor.map(_backfill_shard, shards, *[[arg] * processes for arg in args]))
+    summary = {'symbols': 0, 'skipped_symbols': 0, 'windows': 0, 'skipped_windows': 0, 'candles': 0, 'errors': {}}
+    for shard_summary in summaries:
+        for key, val in shard_summary.items():
+            if key == 'errors':
+                summary['errors'].update(val)
+            else:
+                summary[key] += val
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resumable backfill of FMP historical candles to a Parquet '
+                                                 'candle store')
+    parser.add_argument('symbols', nargs='*', help='symbols to backfill')
+    parser.add_argument('--symbols-file', help='file with one symbol per line')
+    parser.add_argument('--period', default='1d', help="candlestick period ('1d' by default)")
+    parser.add_argument('--start', required=True, help='start date (%%Y-%%m-%%d)')
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'), help='end date (today by default)')
+    parser.add_argument('--output', required=True, help='root directory of the candle store')
+    parser.add_argument('--journal', help='path of the SQLite journal (output/_backfill.sqlite by default)')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rate-limit', type=int, default=300, help='number of calls per minute')
+    parser.add_argument('--api-key', help='FMP API key (FMP_API_KEY environment variable by default)')
+    args = parser.parse_args(argv)
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols += [line.strip() for line in f if line.strip()]
+    if not symbols:
+        parser.error('no symbol to backfill')
+    summary = backfill(symbols, args.period, args.start, args.end, args.output, journal=args.journal,
+                       processes=args.processes, threads=args.threads, api_key=args.api_key,
+                       rate_limit=args.rate_limit, verbose=True)
+    print(f'{summary["symbols"]} symbols stored ({summary["skipped_symbols"]} already done), '
+          f'{summary["windows"]} windows downloaded ({summary["skipped_windows"]} already done), '
+          f'{summary["candles"]} candles')
+    for window, error in summary['errors'].items():
+        print(f'Failed {window}: {error}')
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
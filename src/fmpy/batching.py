@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import Future
+
+
+class _Batch:
+
+    def __init__(self):
+        self.futures = {}
+        self.full = threading.Event()
+
+
+class QuoteBatcher:
+    """
+    Description
+    ----
+    Coalesce the single symbol quote lookups made by concurrent threads into one multi-symbol request.
+    The first lookup of a batch waits for the batch window (or until the batch is full), then sends
+    the request for every symbol collected meanwhile and gives each caller its own quote.
+
+    Input
+    ----
+    fetch (callable)
+        Function requesting the quotes of a list of symbols and returning a list of quote dicts
+    window (float)
+        Number of seconds a batch collects lookups (0.02 by default)
+    max_batch_size (integer)
+        Maximum number of symbols in a batch (100 by default)
+    """
+
+    def __init__(self, fetch, window=0.02, max_batch_size=100):
+        self._fetch = fetch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._batch = None
+        self.lookups = 0
+        self.requests = 0
+
+    def get(self, symbol):
+        """
+        Description
+        ----
+        Return the quote of a symbol, with the same output as FmpClient.get_symbol_info.
+
+        Output
+        ----
+        data (list)
+            List that contain a data dict with the current asset info (empty for an unknown symbol)
+        """
+        with self._lock:
+            self.lookups += 1
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            future = batch.futures.get(symbol.upper())
+            if future is None:
+                future = batch.futures[symbol.upper()] = Future()
+            if len(batch.futures) >= self.max_batch_size:
+                self._batch = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+                self.requests += 1
+            self._flush(batch)
+        return future.result()
+
+    def _flush(self, batch):
+        try:
+            quotes = self._fetch(list(batch.futures))
+        except Exception as error:
+            for future in batch.futures.values():
+                future.set_exception(error)
+            return
+        quotes_by_symbol = {quote['symbol'].upper(): quote for quote in quotes or []}
+        for symbol, future in batch.futures.items():
+            future.set_result([quotes_by_symbol[symbol]] if symbol in quotes_by_symbol else [])
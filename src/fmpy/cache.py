@@ -0,0 +1,262 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from . import urls
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Time to live (in seconds) of the cached responses, by endpoint and grouped like the fmpy.urls sections.
+# Endpoints that are not listed (quotes, historical prices, news...) are never cached by default
+DEFAULT_TTLS = {
+    # STOCK FUNDAMENTALS
+    urls.FINANCIAL_STATEMENT_LIST: DAY,
+    urls.INCOME_STATEMENT: DAY,
+    urls.BALANCE_SHEET_STATEMENT: DAY,
+    urls.CASH_FLOW_STATEMENT: DAY,
+    urls.REVENUE_PRODUCT_SEGMENTATION: DAY,
+    urls.REVENUE_GEOGRAPHIC_SEGMENTATION: DAY,
+    urls.INCOME_STATEMENT_AS_REPORTED: DAY,
+    urls.BALANCE_SHEET_STATEMENT_AS_REPORTED: DAY,
+    urls.CASH_FLOW_STATEMENT_AS_REPORTED: DAY,
+    urls.FULL_FINANCIAL_STATEMENT_AS_REPORTED: DAY,
+    urls.FINANCIAL_REPORTS_DATES: DAY,
+    urls.FINANCIAL_REPORT_JSON: DAY,
+    urls.SHARES_FLOAT: DAY,
+    urls.EARNING_CALL_TRANSCRIPT_V4: DAY,
+    urls.COMPANY_DUE: DAY,
+    # STOCK FUNDAMENTALS ANALYSIS (TTM values and DCF move with the price)
+    urls.RATIOS: DAY,
+    urls.SCORE: DAY,
+    urls.OWNER_EARNING: DAY,
+    urls.ENTERPRISE_VALUES: DAY,
+    urls.INCOME_STATEMENT_GROWTH: DAY,
+    urls.BALANCE_SHEET_STATEMENT_GROWTH: DAY,
+    urls.CASH_FLOW_STATEMENT_GROWTH: DAY,
+    urls.KEY_METRICS: DAY,
+    urls.FINANCIAL_GROWTH: DAY,
+    urls.HISTORICAL_RATING: DAY,
+    urls.HISTORICAL_DISCOUNTED_CASH_FLOW_STATEMENT: DAY,
+    # STOCK SCREENER
+    urls.GET_ALL_COUNTRIES: DAY,
+    # COMPANY INFORMATION
+    urls.PROFILE: DAY,
+    urls.KEY_EXECUTIVES: DAY,
+    urls.COMPANY_OUTLOOK: HOUR,
+    urls.STOCK_PEERS: DAY,
+    urls.DELISTED_COMPANIES: DAY,
+    urls.SYMBOL_CHANGE: DAY,
+    urls.COMPANY_CORE_INFO: DAY,
+    # STOCK LIST
+    urls.STOCK_LIST: 6 * HOUR,
+    urls.TRADABLE_SYMBOL_LIST: 6 * HOUR,
+    urls.ETF_LIST: 6 * HOUR,
+    # ECONOMICS
+    urls.MARKET_RISK_PREMIUM: DAY,
+    # MARKET INDEXES
+    urls.SnP_CONSTITUENT: DAY,
+    urls.NASDAQ_CONSTITUENT: DAY,
+    urls.DOWJONES_CONSTITUENT: DAY,
+    urls.AVAILABLE_INDEXES: DAY,
+    # CRYPTO, FOREX AND COMMODITIES
+    urls.AVAILABLE_CRYPTO: DAY,
+    urls.AVAILABLE_FOREX_PAIRS: DAY,
+    urls.AVAILABLE_COMMODITIES: DAY,
+}
+
+
+def normalize_url(url):
+    """Return the url with sorted query parameters and without the apikey parameter"""
+    parts = urlsplit(url)
+    params = sorted((key, val) for key, val in parse_qsl(parts.query) if key != 'apikey')
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ''))
+
+
+class MemoryCacheBackend:
+    """
+    Description
+    ----
+    In-memory cache backend with least recently used eviction.
+
+    Input
+    ----
+    maxsize (integer)
+        Maximum number of cached responses (1024 by default)
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    Description
+    ----
+    Cache backend stored in a local SQLite file with least recently used eviction.
+    The cache is kept across processes and runs.
+
+    Input
+    ----
+    path (string)
+        Path of the SQLite file
+    maxsize (integer)
+        Maximum number of cached responses (100000 by default)
+    """
+
+    def __init__(self, path, maxsize=100000):
+        self.path = path
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS responses '
+                                     '(key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+
+    def get(self, key):
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT value, expires FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self._connection.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time.time(), key))
+            return row
+
+    def set(self, key, value, expires):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                                     (key, value, expires, time.time()))
+            self._connection.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses '
+                                     'ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.maxsize,))
+
+    def delete(self, key):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        self._connection.close()
+
+
+class ResponseCache:
+    """
+    Description
+    ----
+    Cache of the raw FMP responses used by FmpClient._request. Responses are keyed on the normalized url
+    (apikey excluded) and expire after the time to live of their endpoint.
+
+    Input
+    ----
+    backend (object)
+        MemoryCacheBackend (default) or SQLiteCacheBackend
+    ttls (dict)
+        Time to live in seconds by endpoint url (fmpy.urls constants), merged with DEFAULT_TTLS.
+        A time to live of 0 disables the cache for the endpoint
+    default_ttl (integer)
+        Time to live of the endpoints missing from ttls (0 by default, not cached)
+    """
+
+    def __init__(self, backend=None, ttls=None, default_ttl=0):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        # Longest urls first so that the most specific endpoint matches
+        self._endpoints = sorted(self.ttls, key=len, reverse=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.endpoint_stats = {}
+
+    def get_endpoint(self, url):
+        """Return the fmpy.urls endpoint of an url, None if it has no time to live"""
+        for endpoint in self._endpoints:
+            if url.startswith(endpoint) and url[len(endpoint):len(endpoint) + 1] in ('', '/', '?'):
+                return endpoint
+        return None
+
+    def get_ttl(self, url):
+        endpoint = self.get_endpoint(url)
+        return self.ttls[endpoint] if endpoint else self.default_ttl
+
+    def _record(self, url, hit):
+        endpoint = self.get_endpoint(url) or 'other'
+        with self._lock:
+            stats = self.endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            if hit:
+                self.hits += 1
+                stats['hits'] += 1
+            else:
+                self.misses += 1
+                stats['misses'] += 1
+
+    def get(self, url):
+        """
+        Description
+        ----
+        Return the cached response of an url.
+
+        Output
+        ----
+        content (bytes)
+            Raw response body, None if the url is not cached or expired
+        """
+        if not self.get_ttl(url):
+            return None
+        key = normalize_url(url)
+        item = self.backend.get(key)
+        if item is not None and item[1] < time.time():
+            self.backend.delete(key)
+            item = None
+        self._record(url, item is not None)
+        return item[0] if item is not None else None
+
+    def set(self, url, content):
+        ttl = self.get_ttl(url)
+        if ttl:
+            self.backend.set(normalize_url(url), content, time.time() + ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Description
+        ----
+        Return the cache statistics.
+
+        Output
+        ----
+        stats (dict)
+            Number of hits, misses, hit rate and the hits and misses by endpoint
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'endpoints': {endpoint: dict(stats) for endpoint, stats in self.endpoint_stats.items()}}
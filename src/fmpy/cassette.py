@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+from http.client import responses
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from .cache import normalize_url
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class Cassette(requests.adapters.BaseAdapter):
+    """
+    Description
+    ----
+    Transport adapter recording the FMP responses to gzip compressed cassette files and replaying them
+    without any network call. Requests are matched on their normalized url (sorted query parameters,
+    apikey removed, any host), so a cassette recorded with one API key or server is replayed with another one.
+    Only successful responses are recorded.
+
+    Input
+    ----
+    path (string)
+        Directory of the cassette files (created if it does not exist)
+    mode (string)
+        'auto' (default) replays the recorded requests and records the others, 'replay' never sends a request
+        (CassetteMissError is raised for a request without recorded response), 'record' sends every request
+        and records its response again
+    """
+
+    def __init__(self, path, mode='auto'):
+        super().__init__()
+        if mode not in ['auto', 'replay', 'record']:
+            raise ValueError(f'{mode} mode is not allow (allowed modes are auto,replay,record)')
+        self.path = path
+        self.mode = mode
+        # Adapter sending the requests that are not replayed, set by FmpClient.connect
+        self.adapter = None
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.recorded = 0
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def get_key(url):
+        """Return the matching key of an url, its normalized path and query"""
+        parts = urlsplit(normalize_url(url))
+        return urlunsplit(('', '', parts.path, parts.query, ''))
+
+    def _get_file(self, url):
+        return os.path.join(self.path, f'{hashlib.sha1(self.get_key(url).encode()).hexdigest()}.json.gz')
+
+    def will_replay(self, url):
+        """Return True when the request of an url is answered from the cassette"""
+        return self.mode != 'record' and os.path.exists(self._get_file(url))
+
+    def send(self, request, **kwargs):
+        file = self._get_file(request.url)
+        if self.mode != 'record' and os.path.exists(file):
+            with gzip.open(file, 'rb') as f:
+                record = json.loads(f.readline())
+                body = f.read()
+            with self._lock:
+                self.replayed += 1
+            return self._build_response(request, record['status'], record['headers'], body)
+        if self.mode == 'replay':
+            raise CassetteMissError(f'No recorded response for {self.get_key(request.url)}', request=request)
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code >= 400:
+            return response
+        body = response.content
+        # The body is stored decoded, its transfer headers do not apply anymore
+        headers = {key: val for key, val in response.headers.items()
+                   if key.lower() not in ('content-encoding', 'content-length', 'transfer-encoding', 'connection')}
+        record = {'url': self.get_key(request.url), 'status': response.status_code, 'headers': headers}
+        tmp_file = f'{file}.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_file, 'wb') as f:
+            f.write(json.dumps(record).encode() + b'\n')
+            f.write(body)
+        os.replace(tmp_file, file)
+        with self._lock:
+            self.recorded += 1
+        return self._build_response(request, response.status_code, headers, body)
+
+    @staticmethod
+    def _build_response(request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response.headers['Content-Length'] = str(len(body))
+        # A file-like raw body so that streamed responses (iter_content, CSV parsing) are replayed too
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = responses.get(status)
+        return response
+
+    def close(self):
+        if self.adapter is not None:
+            self.adapter.close()
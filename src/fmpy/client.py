@@ -1,69 +1,409 @@
 import requests
+import bisect
 import os
-import time
+import random
 import sys
 import urllib
 import urllib3
-import pandas as pd
+import collections
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from . import urls
 from . import utils
+from . import frames
+from . import resample
+from .rate_limit import AdaptiveLimiter, TokenBucketLimiter
+from .store import CandleStore
+from .cache import ResponseCache
+from .metrics import ClientMetrics
+from .cassette import Cassette, CassetteMissError
+from .batching import QuoteBatcher
+from .watch import QuotePoller, Watch
 from datetime import datetime, timedelta
 
+# pandas and numpy are only imported by the methods building DataFrames
+np = utils.lazy_import('numpy')
+pd = utils.lazy_import('pandas')
+
+
+def _frame_output(method):
+    # Add the as_frame option to an endpoint returning a list of dicts. Without as_frame,
+    # the client output_format decides ('raw' list of dicts or typed 'frame')
+    @functools.wraps(method)
+    def wrapper(self, *args, as_frame=None, **kwargs):
+        data = method(self, *args, **kwargs)
+        if (self.output_format == 'frame' if as_frame is None else as_frame) and isinstance(data, list):
+            return self._to_frame(method.__name__, data)
+        return data
+    return wrapper
+
 
 class FmpClient:
 
-    def __init__(self, api_key=None, rate_limit=300, timeout=5, request_retry=5):
+    # Number of calendar days of candles that fit in one FMP historical response, by period
+    HISTORICAL_WINDOW_DAYS = {'1min': 3, '5min': 15, '15min': 45, '30min': 90,
+                              '1hour': 180, '4hour': 720, '1d': 1800}
+    # Maximum number of candles of one FMP historical response, by period (the newest candles are kept)
+    HISTORICAL_MAX_ROWS = {'1min': 5000, '5min': 5000, '15min': 5000, '30min': 5000,
+                           '1hour': 5000, '4hour': 5000, '1d': 5000}
+    # Maximum length of the comma separated symbols of a QUOTE url, longer lists are split
+    MAX_SYMBOLS_URL_LENGTH = 1500
+    # Number of rows parsed at once from the bulk CSV responses
+    BULK_CHUNKSIZE = 100000
+    # Status codes of the retried responses, and exponential back off (in seconds) between the retries
+    RETRY_STATUSES = (413, 429, 500, 502, 503, 504)
+    RETRY_BACKOFF = 1
+    RETRY_BACKOFF_MAX = 60
+    # Datasets available in get_fundamentals_panel and the endpoint method of each one
+    FUNDAMENTAL_DATASETS = {'income_statement': 'get_income_statement',
+                            'balance_sheet_statement': 'get_balance_sheet_statement',
+                            'cash_flow_statement': 'get_cash_flow_statement',
+                            'key_metrics': 'get_key_metrics',
+                            'ratios': 'get_ratios',
+                            'enterprise_value': 'get_enterprise_value',
+                            'financial_growth': 'get_financial_growth'}
+
+    def __init__(self, api_key=None, rate_limit=300, timeout=5, request_retry=5, pool_maxsize=10,
+                 burst=1, rate_limiter=None, candle_store=None, cache=None, quote_batch_window=None,
+                 quote_batch_size=100, output_format='raw', metrics=True,
+                 base_url=None, cassette=None, pool_connections=10, pool_block=False, warm_up=0,
+                 max_rate_limit=None):
         self.api_key = api_key
         self._rate_limit = rate_limit
-        self._rate_limit_reference = utils.get_current_minute()
-        self._rate = 0
+        if rate_limiter == 'adaptive':
+            # Rate and concurrency follow the 429 responses and latency of the server: starting from rate_limit,
+            # the rate is probed up to max_rate_limit (twice rate_limit by default) to find the account limit
+            rate_limiter = AdaptiveLimiter(rate_limit, period=60, burst=burst,
+                                           max_rate=max_rate_limit or 2 * rate_limit, max_concurrency=pool_maxsize)
+        self.rate_limiter = rate_limiter if rate_limiter else TokenBucketLimiter(rate_limit, period=60, burst=burst)
         self._timeout = timeout
         self._request_retry = request_retry
-        self.session = None
+        self._pool_maxsize = pool_maxsize
+        self._pool_connections = pool_connections
+        self._pool_block = pool_block
+        self._retry_lock = threading.Lock()
+        self._retry_stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'failures': 0, 'backoff_time': 0.0,
+                             'retried_statuses': {}}
+        self.candle_store = CandleStore(candle_store) if isinstance(candle_store, str) else candle_store
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        self.metrics = ClientMetrics() if metrics is True else (metrics or None)
+        # Requests are sent to base_url instead of the FMP server when set (a local mock server for example)
+        self.base_url = base_url.rstrip('/') if base_url else None
+        # Responses are recorded to and replayed from cassette files when set
+        self.cassette = Cassette(cassette) if isinstance(cassette, str) else cassette
+        # Response of each url being requested, shared by the identical requests made meanwhile
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        # Concurrent get_symbol_info calls are coalesced into one QUOTE request when a batch window is set
+        self.quote_batcher = QuoteBatcher(self._get_quotes, window=quote_batch_window,
+                                          max_batch_size=quote_batch_size) if quote_batch_window else None
+        self.quote_poller = QuotePoller(lambda symbols: self.get_real_time_quotes(symbols, as_frame=False))
+        if output_format not in ['raw', 'frame']:
+            raise ValueError(f'{output_format} output format is not allow (allowed formats are raw,frame)')
+        self.output_format = output_format
+        self._frame_schemas = {}
         self.allow_period = ['1m', '5m', '15m', '30m', '1h', '4h', '1d']
-        self.connect()
-
-    def connect(self):
-        headers = {'Content-Type': 'Application/json'}
-        retries =urllib3.util.retry.Retry(total=self._request_retry,
-                                          backoff_factor=1,
-                                          status_forcelist=[429, 500, 503, 502, 413, 504])
-        adapter = requests.adapters.HTTPAdapter(max_retries=retries)
-        self.session = requests.Session()
-        self.session.mount('https://', adapter)
-        self.session.headers.update(headers)
-
         if self.api_key is None and os.environ.get('FMP_API_KEY'):
             self.api_key = os.environ['FMP_API_KEY']
         elif not self.api_key:
             print('API KEY is empty !')
             sys.exit()
+        # The HTTP session is created by the first request, or by an explicit connect
+        self.session = None
+        self._adapter = None
+        self._session_lock = threading.Lock()
+        if warm_up:
+            self.warm_up(warm_up)
 
-        self.session.params.update({"apikey": self.api_key})
+    def connect(self):
+        # Large JSON responses are several times smaller compressed
+        headers = {'Content-Type': 'Application/json', 'Accept-Encoding': utils.get_accept_encoding()}
+        # Retries are made by _send, where each attempt goes through the rate limiter
+        adapter = requests.adapters.HTTPAdapter(max_retries=0, pool_connections=self._pool_connections,
+                                                pool_maxsize=self._pool_maxsize, pool_block=self._pool_block)
+        self._adapter = adapter
+        session = requests.Session()
+        if self.cassette is not None:
+            self.cassette.adapter = adapter
+            adapter = self.cassette
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(headers)
+        session.params.update({"apikey": self.api_key})
+        # Set once fully configured, the other threads never see a partial session
+        self.session = session
 
     def disconnect(self):
         if self.session:
             self.session.close()
+            self.session = None
+
+    def warm_up(self, connections=None):
+        """
+        Description
+        ----
+        Open keep-alive connections to the FMP server concurrently, so that the first requests sent at once
+        do not wait for their connection and TLS handshakes one after the other. No request is sent.
+
+        Input
+        ----
+        connections (integer)
+            Number of connections to open, at most pool_maxsize (pool_maxsize by default)
+
+        Output
+        ----
+        opened (integer)
+            Number of connections opened
+        """
+        session = self._get_session()
+        if self.cassette is not None and self.cassette.mode == 'replay':
+            return 0
+        connections = min(connections or self._pool_maxsize, self._pool_maxsize)
+        request = requests.Request('GET', self._get_target_url(urls.BASE_URL)).prepare()
+        # The pool used by the requests of the session to this host
+        if hasattr(self._adapter, 'get_connection_with_tls_context'):
+            pool = self._adapter.get_connection_with_tls_context(request, session.verify)
+        else:
+            pool = self._adapter.get_connection(request.url)
+        connection_list = [pool._get_conn() for _ in range(connections)]
+
+        def open_connection(connection):
+            connection.timeout = self._timeout
+            try:
+                connection.connect()
+            except (OSError, urllib3.exceptions.HTTPError):
+                # A connection that failed to open is opened again by its first request
+                return False
+            return True
+
+        try:
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                opened = sum(executor.map(open_connection, connection_list))
+        finally:
+            for connection in connection_list:
+                pool._put_conn(connection)
+        return opened
+
+    def _get_session(self):
+        if self.session is None:
+            with self._session_lock:
+                if self.session is None:
+                    self.connect()
+        return self.session
 
     def check_rate_limit(self):
-        if self._rate >= self._rate_limit:
-            time.sleep((datetime.now().replace(second=0, microsecond=0)
-                        + timedelta(minutes=1) - datetime.now()).seconds)
-        now = utils.get_current_minute()
-        if now > self._rate_limit_reference:
-            self._rate_limit_reference = now
-            self._rate = 0
-        self._rate += 1
+        # The limiter is thread-safe, the budget is shared by every thread using this client
+        return self.rate_limiter.acquire()
 
     def _request(self, url):
-        self.check_rate_limit()
-        request = self.session.get(url, timeout=self._timeout)
+        if self.cache is not None:
+            content = self.cache.get(url)
+            if content is not None:
+                if self.metrics is not None:
+                    self.metrics.record_cache_hit(url)
+                return self._decode(url, content)
+        # Single-flight: only the first caller of an url sends the request, the callers asking for the same url
+        # before its response arrives wait for it instead of spending rate limit budget
+        with self._in_flight_lock:
+            future = self._in_flight.get(url)
+            leader = future is None
+            if leader:
+                future = self._in_flight[url] = Future()
+        if leader:
+            try:
+                future.set_result(self._get_content(url))
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._in_flight_lock:
+                    del self._in_flight[url]
+        elif self.metrics is not None:
+            self.metrics.record_shared(url)
+        # Every caller decodes its own copy of the response so that modifying it does not affect the others
+        return self._decode(url, future.result())
+
+    def _decode(self, url, content):
+        if self.metrics is None:
+            return utils.json_loads(content)
+        started = time.perf_counter()
+        data = utils.json_loads(content)
+        self.metrics.record_decode(url, time.perf_counter() - started)
+        return data
+
+    def _send(self, url, stream=False):
+        # Send a GET request, retried on connection errors and RETRY_STATUSES responses. Every attempt waits for
+        # the rate limiter, so that the retries spend the rate limit budget like any other request
+        target_url = self._get_target_url(url)
+        attempt = 0
+        while True:
+            try:
+                request = self._send_attempt(url, target_url, stream, attempt)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= self._request_retry or isinstance(error, CassetteMissError):
+                    self._record_attempts(attempt, failed=True)
+                    raise
+                status, delay = 'error', self._get_backoff(attempt)
+            else:
+                status = request.status_code
+                if status not in self.RETRY_STATUSES:
+                    self._record_attempts(attempt)
+                    return request
+                # The server asks to wait at least Retry-After seconds before the next request
+                retry_after = utils.parse_retry_after(request.headers.get('Retry-After'))
+                delay = max(self._get_backoff(attempt), retry_after or 0.0)
+                if attempt >= self._request_retry or delay > self.RETRY_BACKOFF_MAX:
+                    self._record_attempts(attempt, failed=True)
+                    return request
+                # The connection goes back to the pool without reading the rest of a streamed body
+                request.close()
+            with self._retry_lock:
+                statuses = self._retry_stats['retried_statuses']
+                statuses[status] = statuses.get(status, 0) + 1
+                self._retry_stats['backoff_time'] += delay
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_attempt(self, url, target_url, stream, attempt):
+        # Send a GET request once the rate limiter allows it and record its metrics
+        # Replayed responses do not spend rate limit budget
+        limited = self.cassette is None or not self.cassette.will_replay(target_url)
+        wait = self.check_rate_limit() if limited else 0.0
+        started = time.perf_counter()
+        try:
+            request = self._get_session().get(target_url, timeout=self._timeout, stream=stream)
+        except requests.RequestException as error:
+            latency = time.perf_counter() - started
+            if limited and isinstance(error, requests.Timeout):
+                self.rate_limiter.record_response(None, latency)
+            if self.metrics is not None:
+                self.metrics.record_request(url, None, latency, retries=min(attempt, 1), rate_limit_wait=wait)
+            raise
+        finally:
+            if limited:
+                self.rate_limiter.release()
+        latency = time.perf_counter() - started
+        if limited:
+            self.rate_limiter.record_response(request.status_code, latency,
+                                              utils.parse_retry_after(request.headers.get('Retry-After')))
+        if self.metrics is not None:
+            # The body of a streamed response is not read yet, its announced length is recorded instead
+            size = int(request.headers.get('Content-Length', 0)) if stream else len(request.content)
+            self.metrics.record_request(url, request.status_code, latency, size, min(attempt, 1), wait)
+        return request
+
+    def _get_backoff(self, attempt):
+        # Exponential back off, half of it jittered so that the threads throttled together do not retry together
+        backoff = min(self.RETRY_BACKOFF * 2 ** attempt, self.RETRY_BACKOFF_MAX)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def _record_attempts(self, retries, failed=False):
+        with self._retry_lock:
+            self._retry_stats['requests'] += 1
+            self._retry_stats['attempts'] += retries + 1
+            self._retry_stats['retries'] += retries
+            self._retry_stats['failures'] += failed
+
+    def retry_stats(self):
+        """
+        Description
+        ----
+        Return the retry statistics of the requests sent by the client.
+
+        Output
+        ----
+        stats (dict)
+            Number of requests, attempts (requests and their retries, each one spending rate limit budget),
+            retries, requests failed after their last retry, time spent in back off (in seconds) and number
+            of retries by status code ('error' for connection errors and timeouts)
+        """
+        with self._retry_lock:
+            return {**self._retry_stats, 'retried_statuses': dict(self._retry_stats['retried_statuses'])}
+
+    def _get_target_url(self, url):
+        if self.base_url and url.startswith(urls.BASE_URL):
+            return f'{self.base_url}{url[len(urls.BASE_URL):]}'
+        return url
+
+    def _get_content(self, url):
+        request = self._send(url)
         request.raise_for_status()
-        return request.json()
+        if self.cache is not None:
+            self.cache.set(url, request.content)
+        return request.content
+
+    def _iter_request(self, url, chunk_size=65536):
+        # Yield the records of a JSON array response while its body is streamed
+        with self._send(url, stream=True) as request:
+            request.raise_for_status()
+            yield from utils.iter_json_array(request.iter_content(chunk_size))
+
+    def _iter_csv(self, url, chunksize):
+        # Parse a CSV response chunk by chunk while it is streamed. The dtypes inferred from the first chunk
+        # are applied to the next ones so that every chunk has the same schema (see frames.infer_stream_schema)
+        with self._send(url, stream=True) as request:
+            request.raise_for_status()
+            request.raw.decode_content = True
+            schema = None
+            for df in pd.read_csv(request.raw, chunksize=chunksize, low_memory=False):
+                if schema is None:
+                    schema = frames.infer_stream_schema(df)
+                yield frames.apply_schema(df, schema)
+
+    def _get_bulk(self, url, params, chunksize):
+        url = f'{url}?{urllib.parse.urlencode(self.make_params(params))}'
+        if chunksize:
+            return self._iter_csv(url, chunksize)
+        chunks = list(self._iter_csv(url, self.BULK_CHUNKSIZE))
+        if not chunks:
+            return None
+        return frames.concat_frames(chunks, frames.infer_schema(chunks[0]))
 
     def make_params(self, parmas_dict):
         return {key: val for key, val in parmas_dict.items() if val is not None}
 
+    def _to_frame(self, endpoint, data):
+        # The dtypes of each endpoint are inferred once and cached for the next calls
+        return frames.records_to_frame(data, self._frame_schemas.setdefault(endpoint, {}))
+
+    @staticmethod
+    def _iter_pages(get_page, date_key, since=None, prefetch=2, start_page=0):
+        # Yield the records of a paged endpoint (newest first) while the next pages are requested ahead.
+        # Iteration stops at the first empty page or at the first record older than since
+        with ThreadPoolExecutor(max_workers=prefetch + 1) as executor:
+            pending = collections.deque(executor.submit(get_page, page)
+                                        for page in range(start_page, start_page + prefetch + 1))
+            next_page = start_page + prefetch + 1
+            try:
+                while True:
+                    records = pending.popleft().result()
+                    if not records:
+                        return
+                    pending.append(executor.submit(get_page, next_page))
+                    next_page += 1
+                    for record in records:
+                        if since and record.get(date_key) and record[date_key] < since:
+                            return
+                        yield record
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def _run_concurrently(func, items, max_workers):
+        # Return the results and the raised exceptions of func over items, both keyed by item
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(func, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception as error:
+                    errors[item] = error
+        return results, errors
+
     def get_symbol_info(self, symbol):
         """
         Description
@@ -80,6 +420,8 @@ class FmpClient:
         data (list)
             List that contain a data dict with the current asset info
         """
+        if self.quote_batcher is not None:
+            return self.quote_batcher.get(symbol)
         return self._request(f'{urls.QUOTE}/{symbol}')
 
     def get_symbol_close_price(self, symbol):
@@ -100,16 +442,20 @@ class FmpClient:
         """
         return self.get_symbol_info(symbol)[0]['price']
 
-    def get_symbols_info(self, symbols):
+    @_frame_output
+    def get_symbols_info(self, symbols, max_workers=4):
         """
         Description
         ----
         Gives current information for the provided list of assets (can be stocks,ETF,Funds,Index,Crypto and Commodities).
+        Long lists are split into several requests downloaded concurrently.
 
         Input
         ----
         symbols (list)
             A list of assets (for example: ["TSLA", "BTCUSD"])
+        max_workers (integer)
+            Number of requests downloaded at the same time for long lists (4 by default)
 
         Output
         ----
@@ -118,9 +464,89 @@ class FmpClient:
         """
         if not isinstance(symbols, list):
             raise TypeError('symbols must be a list')
-        return self._request(f'{urls.QUOTE}/{",".join(symbols)}')
+        return self._get_chunked_quotes(urls.QUOTE, symbols, max_workers)
+
+    @_frame_output
+    def get_real_time_quotes(self, symbols, max_workers=4):
+        """
+        Description
+        ----
+        Gives the real time price and volume for the provided list of assets (short quote).
+        Long lists are split into several requests downloaded concurrently.
+
+        Input
+        ----
+        symbols (list)
+            A list of assets (for example: ["TSLA", "AAPL"])
+        max_workers (integer)
+            Number of requests downloaded at the same time for long lists (4 by default)
+
+        Output
+        ----
+        data (list)
+            List that contain the symbol, price and volume dict for all the asset in the requested list
+        """
+        if not isinstance(symbols, list):
+            raise TypeError('symbols must be a list')
+        return self._get_chunked_quotes(urls.QUOTE_REAL_TIME, symbols, max_workers)
+
+    def watch(self, symbols, interval=1.0, callback=None):
+        """
+        Description
+        ----
+        Watch the real time quotes of a list of assets. All the watches of a client share a single
+        background polling loop that requests the quotes in batches and only pushes the changed ones.
+
+        Input
+        ----
+        symbols (list)
+            A list of assets (for example: ["TSLA", "AAPL"])
+        interval (float)
+            Number of seconds between two polls (1 by default)
+        callback (callable)
+            Function called from the polling thread with a dict of the changed quotes by symbol.
+            Without callback, the changes are consumed by iterating the returned Watch
+
+        Output
+        ----
+        watch (Watch)
+            Subscription to close (or use as a context manager) to stop watching
+        """
+        if not isinstance(symbols, list):
+            raise TypeError('symbols must be a list')
+        watch = Watch(self.quote_poller, symbols, interval, callback)
+        self.quote_poller.subscribe(watch)
+        return watch
+
+    def _get_quotes(self, symbols, url=urls.QUOTE):
+        return self._request(f'{url}/{",".join(symbols)}')
+
+    def _get_chunked_quotes(self, url, symbols, max_workers):
+        chunks = self._chunk_symbols(symbols, self.MAX_SYMBOLS_URL_LENGTH)
+        if len(chunks) <= 1:
+            return self._get_quotes(symbols, url)
+        results, errors = self._run_concurrently(lambda index: self._get_quotes(chunks[index], url),
+                                                 range(len(chunks)), max_workers)
+        if errors:
+            raise next(iter(errors.values()))
+        return [quote for index in range(len(chunks)) for quote in results[index] or []]
+
+    @staticmethod
+    def _chunk_symbols(symbols, max_length):
+        # Split symbols into comma separated lists of at most max_length characters
+        chunks, chunk, length = [], [], 0
+        for symbol in symbols:
+            if chunk and length + len(symbol) + 1 > max_length:
+                chunks.append(chunk)
+                chunk, length = [], 0
+            chunk.append(symbol)
+            length += len(symbol) + 1
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
-    def get_historical_data(self, symbol, period='1d', start=None, end=None, get_raw_data=False, datetime_index=False):
+    def get_historical_data(self, symbol, period='1d', start=None, end=None, get_raw_data=False, datetime_index=False,
+                            mode='cursor', max_workers=4, price_dtype='float64', date_index=True):
         """
         Description
         ----
@@ -138,6 +564,22 @@ class FmpClient:
             End date (formated as %Y-%m-%d)
         get_raw_data (bool)
             Return raw historical data (raw FMP API output)
+        datetime_index (bool)
+            Use a datetime index instead of a string one
+        mode (string)
+            'cursor' (default) pages backwards one request at a time from the end date.
+            'parallel' splits the range into fixed windows up front and downloads them concurrently
+        max_workers (integer)
+            Number of windows downloaded at the same time in 'parallel' mode (4 by default)
+        price_dtype (string)
+            Dtype of the Open, High, Low and Close columns ('float64' by default, 'float32' halves their memory)
+        date_index (bool)
+            Index the DataFrame by Date (True by default). When False, Date is kept as a datetime column
+            and the DataFrame has a default integer index
+
+        When the client has a candle_store, only the ranges missing from the store are downloaded
+        (raw data is always downloaded from FMP). Intraday candles are aggregated from finer stored candles
+        without any request when those cover the whole range (for example: 1h candles from stored 5m candles).
 
         Output
         ----
@@ -152,76 +594,241 @@ class FmpClient:
             if date and not utils.is_valid_time_format(date):
                 raise ValueError(f'{date} as a wrong date format')
         formated_period = utils.format_period(period)
-        data = self._get_batch_historical_data(symbol, formated_period, _start, _end)
+        if self.candle_store is not None and not get_raw_data:
+            df = self._get_resampled_historical_data(symbol, formated_period, _start, _end)
+            if df is None:
+                df = self._get_stored_historical_data(symbol, formated_period, _start, _end, mode, max_workers)
+            return self._format_stored_df(df, formated_period, datetime_index, price_dtype, date_index)
+        data = self._fetch_historical_data(symbol, formated_period, _start, _end, mode, max_workers)
         if not data:
             return None
         elif get_raw_data:
             return data
         else:
-            return self._convert_raw_data_to_df(data, datetime_index)
+            return self._convert_raw_data_to_df(data, datetime_index, price_dtype=price_dtype, date_index=date_index)
+
+    def get_historical_data_many(self, symbols, period='1d', start=None, end=None, max_workers=8,
+                                 get_raw_data=False, datetime_index=False, long_format=False, mode='cursor',
+                                 price_dtype='float64'):
+        """
+        Description
+        ----
+        Gives historical data for several assets. Symbols are downloaded concurrently by a pool of workers
+        sharing the client connection pool and rate limit.
+
+        Input
+        ----
+        symbols (list)
+            A list of assets (for example: ["TSLA", "AAPL"])
+        period (string)
+            Candlestick period. Can be '1m', '5m', '15m', '30m', '1h', '4h', '1d' ('1d' by default)
+        start (string)
+            Start date (formated as %Y-%m-%d)
+        end (string)
+            End date (formated as %Y-%m-%d)
+        max_workers (integer)
+            Number of symbols downloaded at the same time (8 by default)
+        get_raw_data (bool)
+            Return raw historical data (raw FMP API output)
+        datetime_index (bool)
+            Use a datetime index instead of a string one
+        long_format (bool)
+            Return a single DataFrame indexed by (Symbol, Date) instead of a dict
+        mode (string)
+            Download mode of each symbol, 'cursor' (default) or 'parallel' (see get_historical_data). In 'parallel'
+            mode the windows of the symbols downloaded at the same time share the pool_maxsize connections
+        price_dtype (string)
+            Dtype of the Open, High, Low and Close columns ('float64' by default)
+
+        Output
+        ----
+        data (dict or DataFrame)
+            Historical data by symbol (symbols without data are omitted from the long format DataFrame)
+        errors (dict)
+            Exception raised for each symbol that failed, the other symbols are still downloaded
+        """
+        if not isinstance(symbols, list):
+            raise TypeError('symbols must be a list')
+        if period not in self.allow_period:
+            raise ValueError(f'{period} period is not allow (allowed periods are {",".join(self.allow_period)})')
+        if long_format and get_raw_data:
+            raise ValueError('long_format is not available with get_raw_data')
+        # Each symbol downloads its windows with a share of the connection pool, so that the requests sent at
+        # the same time never exceed pool_maxsize (the connections above it would be discarded)
+        window_workers = max(self._pool_maxsize // max_workers, 1)
+        results, errors = self._run_concurrently(
+            lambda symbol: self.get_historical_data(symbol, period=period, start=start, end=end,
+                                                    get_raw_data=get_raw_data, datetime_index=datetime_index,
+                                                    mode=mode, max_workers=window_workers, price_dtype=price_dtype),
+            symbols, max_workers)
+        data = {symbol: results[symbol] for symbol in symbols if symbol in results}
+        errors = {symbol: errors[symbol] for symbol in symbols if symbol in errors}
+        if long_format:
+            symbol_frames = {symbol: df for symbol, df in data.items() if df is not None}
+            data = pd.concat(symbol_frames, names=['Symbol']) if symbol_frames else None
+        return data, errors
 
     @staticmethod
-    def _convert_raw_data_to_df(raw_data, datetime_index):
-        association_dict = {'Date': 'date', 'Open': 'open', 'High': 'high',
-                            'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
-        data_dict = {item: [] for item in association_dict.keys()}
-        for data in raw_data[::-1]:
-            for item in association_dict.keys():
-                data_dict[item].append(data[association_dict[item]])
-        df = pd.DataFrame.from_dict(data_dict)
-        df = df.iloc[::-1]
-        if datetime_index:
-            df['Date'] = pd.to_datetime(df['Date'])
-        return df.set_index('Date').drop_duplicates()
+    def _convert_raw_data_to_df(raw_data, datetime_index, price_dtype='float64', date_index=True):
+        # Build every column in one typed pass over the raw candles (oldest first)
+        count = len(raw_data)
+        data_dict = {'Date': [data['date'] for data in raw_data]}
+        for column, key in [('Open', 'open'), ('High', 'high'), ('Low', 'low'), ('Close', 'close')]:
+            data_dict[column] = np.fromiter((data[key] for data in raw_data), dtype=price_dtype, count=count)
+        volume = np.fromiter((data['volume'] for data in raw_data), dtype='float64', count=count)
+        # Some assets (crypto for example) have fractional volumes that are kept as float64
+        data_dict['Volume'] = volume.astype('int64') if np.array_equal(volume, np.trunc(volume)) else volume
+        if datetime_index or not date_index:
+            data_dict['Date'] = pd.to_datetime(data_dict['Date'], format='ISO8601')
+        df = pd.DataFrame(data_dict)
+        if not date_index:
+            return df[~df['Date'].duplicated()].reset_index(drop=True)
+        df = df.set_index('Date')
+        return df[~df.index.duplicated()]
 
     def _get_historical_url(self, symbol, period, start, end):
         params = {key: val for key, val in {'from': start, 'to': end}.items() if val}
         return f'{urls.HISTORICAL_PRICE_FULL}/{symbol}?{urllib.parse.urlencode(params)}' if period == '1d' else\
                    f'{urls.HISTORICAL_CHART}/{period}/{symbol}?{urllib.parse.urlencode(params)}'
 
+    def _fetch_historical_data(self, symbol, period, start, end, mode, max_workers):
+        if mode == 'cursor':
+            return self._get_batch_historical_data(symbol, period, start, end)
+        elif mode == 'parallel':
+            return self._get_parallel_historical_data(symbol, period, start, end, max_workers)
+        raise ValueError(f"{mode} mode is not allow (allowed modes are cursor,parallel)")
+
+    def _get_stored_historical_data(self, symbol, period, start, end, mode, max_workers):
+        # Only the ranges missing from the store are downloaded. The last stored day before a missing range is
+        # downloaded again since its candles may have been incomplete, the coverage never goes beyond the current
+        # time
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for range_start, range_end in self.candle_store.get_missing_ranges(symbol, period, start, end):
+            if range_start != start:
+                range_start = f'{range_start.split(" ")[0]} 00:00:00'
+            if range_start > now:
+                # No candle exists yet
+                continue
+            data = self._fetch_historical_data(symbol, period, range_start, range_end, mode, max_workers)
+            df = self._convert_raw_data_to_df(data, True) if data else None
+            self.candle_store.write(symbol, period, df, range_start, min(range_end, now))
+        return self.candle_store.read(symbol, period, start, end)
+
+    def _get_resampled_historical_data(self, symbol, period, start, end):
+        if self.candle_store.get_covering_range(symbol, period, start, end) is not None:
+            return None
+        for source_period in resample.get_source_periods(period):
+            coverage = self.candle_store.get_covering_range(symbol, source_period, start, end)
+            if coverage is None:
+                continue
+            # Source candles are read from the start of the day so that the session start is known, and up to
+            # the end of the last output candle
+            read_start = max(f'{start.split(" ")[0]} 00:00:00', coverage[0])
+            read_end = datetime.strptime(end, '%Y-%m-%d %H:%M:%S') + \
+                timedelta(minutes=resample.PERIOD_MINUTES[period])
+            read_end = min(read_end.strftime('%Y-%m-%d %H:%M:%S'), coverage[1])
+            df = self.candle_store.read(symbol, source_period, read_start, read_end)
+            df = resample.resample_candles(df, period)
+            return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+        return None
+
+    @staticmethod
+    def _format_stored_df(df, period, datetime_index, price_dtype, date_index):
+        # Give stored candles the same shape as _convert_raw_data_to_df
+        if df.empty:
+            return None
+        df = df.astype({'Open': price_dtype, 'High': price_dtype, 'Low': price_dtype, 'Close': price_dtype})
+        if not date_index:
+            return df.reset_index()
+        if not datetime_index:
+            df.index = df.index.strftime('%Y-%m-%d' if period == '1d' else '%Y-%m-%d %H:%M:%S').rename('Date')
+        return df
+
+    @staticmethod
+    def _trim_historical_window(data_list, start, end=None):
+        # Return the candles of an FMP response (newest first) within [start, end], oldest first.
+        # Dates are ISO formatted so the sorted strings are compared with a binary search, no parsing needed
+        window_data = data_list[::-1]
+        dates = [item['date'] for item in window_data]
+        if len(dates[0]) == 10:
+            dates = [f'{date} 00:00:00' for date in dates]
+        start_index = bisect.bisect_left(dates, start)
+        end_index = bisect.bisect_right(dates, end) if end else len(dates)
+        return window_data[start_index:end_index]
+
     def _get_batch_historical_data(self, symbol, period, start, end):
         sanitize_start = start.split(' ')[0]
         sanitize_end = end.split(' ')[0]
         target_start_datetime = datetime.strptime(sanitize_start, '%Y-%m-%d')
         _end = sanitize_end
         prev_data = None
-        batch_data = []
-        loop_index = 1
+        windows = []
         prev_start = None
         while True:
             url = self._get_historical_url(symbol, period, sanitize_start, _end)
             data = self._request(url)
             if not data or prev_data == data:
-                return batch_data
-            data_list = data if isinstance(data, list) else data['historical']
+                break
+            data_list = data if isinstance(data, list) else data.get('historical')
+            if not data_list:
+                break
             new_start = data_list[-1]['date'].split(' ')[0]
             if prev_start == new_start:
                 break
-            start_index = 0
-            end_index = len(data_list)-1
-            end_target_datetime = datetime.strptime(start, "%Y-%m-%d %H:%M:%S")
-            for i, item in enumerate(data_list):
-                date = f'{item["date"]} 00:00:00' if len(item['date'].split(' ')) == 1 else item["date"]
-                date_datetime = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
-                if loop_index == 1:
-                    start_target_datetime = datetime.strptime(end, "%Y-%m-%d %H:%M:%S")
-                    if date_datetime > start_target_datetime:
-                        start_index += 1
-                if end_target_datetime > date_datetime:
-                    end_index = i
-                    break
-                if item['date'].split(' ')[0] == new_start:
-                    end_index = i + 1
-            sanitize_data = data_list[start_index:end_index][::-1]
-            batch_data = sanitize_data + batch_data
+            # Only the first window can contain candles after end
+            windows.append(self._trim_historical_window(data_list, start, end if not windows else None))
             new_start_datetime = datetime.strptime(new_start, '%Y-%m-%d')
             if new_start_datetime <= target_start_datetime:
                 break
             _end = datetime.strftime(new_start_datetime - timedelta(days=1), "%Y-%m-%d")
             prev_data = data
             prev_start = _end
-            loop_index += 1
-        return batch_data
+        # Windows are collected newest first and concatenated once
+        return [item for window_data in windows[::-1] for item in window_data]
+
+    def _plan_historical_windows(self, period, start, end):
+        # Split [start, end] into consecutive windows (newest first) small enough to fit in one FMP response
+        window_days = timedelta(days=self.HISTORICAL_WINDOW_DAYS[period])
+        target_start_datetime = datetime.strptime(start.split(' ')[0], '%Y-%m-%d')
+        window_end = datetime.strptime(end.split(' ')[0], '%Y-%m-%d')
+        windows = []
+        while window_end >= target_start_datetime:
+            window_start = max(window_end - window_days + timedelta(days=1), target_start_datetime)
+            windows.append((window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')))
+            window_end = window_start - timedelta(days=1)
+        return windows
+
+    def _get_window_historical_data(self, symbol, period, window_start, window_end):
+        data_list = []
+        _end = window_end
+        while True:
+            data = self._request(self._get_historical_url(symbol, period, window_start, _end))
+            window_data = (data if isinstance(data, list) else data.get('historical', [])) if data else []
+            data_list += window_data
+            if not window_data:
+                return data_list
+            # A response reaching the FMP cap was truncated, the rest of the window is requested again up to its
+            # first (possibly partial) day, dedupe happens when stitching. A response starting on its own end day
+            # made no progress
+            first_day = window_data[-1]['date'].split(' ')[0]
+            if len(window_data) < self.HISTORICAL_MAX_ROWS[period] or first_day == _end:
+                return data_list
+            _end = first_day
+
+    def _get_parallel_historical_data(self, symbol, period, start, end, max_workers):
+        windows = self._plan_historical_windows(period, start, end)
+        results, errors = self._run_concurrently(
+            lambda window: self._get_window_historical_data(symbol, period, *window), windows, max_workers)
+        if errors:
+            raise next(iter(errors.values()))
+        # Stitch the windows and dedupe the candles by timestamp, oldest first like the cursor walk
+        candles = {}
+        for window in windows[::-1]:
+            for item in results[window][::-1]:
+                date = f'{item["date"]} 00:00:00' if len(item['date'].split(' ')) == 1 else item['date']
+                if start <= date <= end:
+                    candles[date] = item
+        return [candles[date] for date in sorted(candles)]
 
     def download_historical_data_to_excel(self, symbol, file, period='1d', start=None, end=None, sheet_name=None):
         """
@@ -279,6 +886,7 @@ class FmpClient:
         """
         return self._request(f'{urls.FINANCIAL_STATEMENT_LIST}')
 
+    @_frame_output
     def get_income_statement(self, symbol, period=None, limit=None):
         """
         Description
@@ -293,6 +901,7 @@ class FmpClient:
         params = {key: val for key, val in {'period': period, 'limit': limit}.items() if val}
         return self._request(f'{urls.INCOME_STATEMENT}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    @_frame_output
     def get_balance_sheet_statement(self, symbol, period=None, limit=None):
         """
         Description
@@ -307,6 +916,7 @@ class FmpClient:
         params = {key: val for key, val in {'period': period, 'limit': limit}.items() if val}
         return self._request(f'{urls.BALANCE_SHEET_STATEMENT}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    @_frame_output
     def get_cash_flow_statement(self, symbol, period=None, limit=None):
         """
         Description
@@ -321,6 +931,7 @@ class FmpClient:
         params = {key: val for key, val in {'period': period, 'limit': limit}.items() if val}
         return self._request(f'{urls.CASH_FLOW_STATEMENT}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    @_frame_output
     def get_income_statement_as_reported(self, symbol, period=None, limit=None):
         """
         Description
@@ -335,6 +946,7 @@ class FmpClient:
         params = {key: val for key, val in {'period': period, 'limit': limit}.items() if val}
         return self._request(f'{urls.INCOME_STATEMENT_AS_REPORTED}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    @_frame_output
     def get_balance_sheet_statement_as_reported(self, symbol, period=None, limit=None):
         """
         Description
@@ -349,6 +961,7 @@ class FmpClient:
         params = {key: val for key, val in {'period': period, 'limit': limit}.items() if val}
         return self._request(f'{urls.BALANCE_SHEET_STATEMENT_AS_REPORTED}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    @_frame_output
     def get_cash_flow_statement_as_reported(self, symbol, period=None, limit=None):
         """
         Description
@@ -377,6 +990,67 @@ class FmpClient:
         params = {key: val for key, val in {'period': period}.items() if val}
         return self._request(f'{urls.INCOME_STATEMENT_AS_REPORTED}/{symbol}?{urllib.parse.urlencode(params)}')
 
+    def get_fundamentals_panel(self, symbols, datasets=None, period='quarter', limit=None, max_workers=8):
+        """
+        Description
+        ----
+        Gives a panel of fundamentals for several companies. Every (symbol, dataset) pair is downloaded
+        concurrently and all the datasets are aligned in a single DataFrame.
+
+        Input
+        ----
+        symbols (list)
+            A list of companies (for example: ["AAPL", "MSFT"])
+        datasets (list)
+            Datasets of the panel among 'income_statement', 'balance_sheet_statement', 'cash_flow_statement',
+            'key_metrics', 'ratios', 'enterprise_value' and 'financial_growth'
+            (the first five by default)
+        period (string)
+            'quarter' (default) or 'annual'
+        limit (integer)
+            Number of periods by company
+        max_workers (integer)
+            Number of requests downloaded at the same time (8 by default)
+
+        Output
+        ----
+        data (DataFrame)
+            Panel indexed by (symbol, date). A column present in several datasets (reportedCurrency,
+            calendarYear...) is only kept from the first dataset that has it
+        errors (dict)
+            Exception raised for each (symbol, dataset) pair that failed, the other pairs are still downloaded
+        """
+        if not isinstance(symbols, list):
+            raise TypeError('symbols must be a list')
+        datasets = datasets if datasets else ['income_statement', 'balance_sheet_statement', 'cash_flow_statement',
+                                              'key_metrics', 'ratios']
+        for dataset in datasets:
+            if dataset not in self.FUNDAMENTAL_DATASETS:
+                raise ValueError(f'{dataset} dataset is not allow (allowed datasets are '
+                                 f'{",".join(self.FUNDAMENTAL_DATASETS)})')
+        pairs = [(symbol, dataset) for dataset in datasets for symbol in symbols]
+        results, errors = self._run_concurrently(
+            lambda pair: getattr(self, self.FUNDAMENTAL_DATASETS[pair[1]])(pair[0], period=period, limit=limit,
+                                                                           as_frame=False),
+            pairs, max_workers)
+        panel = None
+        for dataset in datasets:
+            # One typed DataFrame by dataset, built from the records of all the symbols at once
+            records = [record for symbol in symbols if isinstance(results.get((symbol, dataset)), list)
+                       for record in results[(symbol, dataset)]]
+            if not records:
+                continue
+            df = self._to_frame(self.FUNDAMENTAL_DATASETS[dataset], records).set_index(['symbol', 'date'])
+            df = df[~df.index.duplicated()]
+            if panel is None:
+                panel = df
+            else:
+                panel = panel.join(df.drop(columns=[column for column in df.columns if column in panel.columns]),
+                                   how='outer')
+        if panel is not None:
+            panel = panel.sort_index()
+        return panel, {pair: errors[pair] for pair in pairs if pair in errors}
+
     def get_financial_reports_dates(self, symbol):
         """
         Description
@@ -418,6 +1092,7 @@ class FmpClient:
         """
         return self._request(f'{urls.SHARES_FLOAT}?symbol={symbol}')
 
+    @_frame_output
     def get_all_shares_float(self):
         """
         Description
@@ -431,6 +1106,20 @@ class FmpClient:
         """
         return self._request(f'{urls.SHARES_FLOAT}/all')
 
+    def iter_all_shares_float(self):
+        """
+        Description
+        ----
+        Iterate over all availables shares float while the response is downloaded (flat memory usage).
+
+        Output
+        ----
+        shares_float (iterator)
+            Iterator over the data dict of each shares float
+        """
+        return self._iter_request(f'{urls.SHARES_FLOAT}/all')
+
+    @_frame_output
     def get_sec_rss_feeds(self, page=None, datatype=None, limit=None, type=None, start=None, end=None, isDone=None):
         """
         Description
@@ -447,6 +1136,33 @@ class FmpClient:
                                             'type': type, 'from':start, 'to': end, 'isDone': _isdone}.items() if val}
         return self._request(f'{urls.RSS_FEED}?{urllib.parse.urlencode(params)}')
 
+    def iter_sec_rss_feeds(self, datatype=None, limit=None, type=None, start=None, end=None, isDone=None,
+                           since=None, prefetch=2, start_page=0):
+        """
+        Description
+        ----
+        Iterate over the SEC RSS (Really Simple Syndication) feeds of all pages, the next pages are
+        downloaded while the current one is consumed.
+
+        Input
+        ----
+        since (string)
+            Stop at the first feed older than this date (formated as %Y-%m-%d or %Y-%m-%d %H:%M:%S)
+        prefetch (integer)
+            Number of pages downloaded ahead (2 by default)
+        start_page (integer)
+            First page (0 by default)
+
+        Output
+        ----
+        feeds (iterator)
+            Iterator over the data dict of each SEC RSS feed
+        """
+        return self._iter_pages(lambda page: self.get_sec_rss_feeds(page=page, datatype=datatype, limit=limit,
+                                                                    type=type, start=start, end=end, isDone=isDone,
+                                                                    as_frame=False),
+                                'date', since=since, prefetch=prefetch, start_page=start_page)
+
     def get_earning_call_transcript(self, symbol, year=None, quarter=None):
         """
         Description
@@ -507,6 +1223,7 @@ class FmpClient:
 
     ##### STOCK FUNDAMENTALS ANALYSIS #####
 
+    @_frame_output
     def get_ttm_ratios(self, symbol):
         """
         Description
@@ -522,6 +1239,7 @@ class FmpClient:
         """
         return self._request(f'{urls.RATIOS_TTM}/{symbol}')
 
+    @_frame_output
     def get_ratios(self, symbol, period=None, limit=None):
         """
         Description
@@ -537,6 +1255,7 @@ class FmpClient:
         return self._request(f'{urls.RATIOS}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"period": period, "limit": limit}))}')
 
+    @_frame_output
     def get_score(self, symbol):
         """
         Description
@@ -551,6 +1270,7 @@ class FmpClient:
         """
         return self._request(f'{urls.SCORE}/{symbol}')
 
+    @_frame_output
     def get_owner_earning(self, symbol):
         """
         Description
@@ -565,6 +1285,7 @@ class FmpClient:
         """
         return self._request(f'{urls.SCORE}/{symbol}')
 
+    @_frame_output
     def get_enterprise_value(self, symbol, period=None, limit=None):
         """
         Description
@@ -579,6 +1300,7 @@ class FmpClient:
         return self._request(f'{urls.ENTERPRISE_VALUES}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"period": period, "limit": limit}))}')
 
+    @_frame_output
     def get_income_statement_growth(self, symbol, limit=None):
         """
         Description
@@ -593,6 +1315,7 @@ class FmpClient:
         return self._request(f'{urls.INCOME_STATEMENT_GROWTH}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_balance_sheet_growth(self, symbol, limit=None):
         """
         Description
@@ -607,6 +1330,7 @@ class FmpClient:
         return self._request(f'{urls.BALANCE_SHEET_STATEMENT_GROWTH}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_cash_flow_growth(self, symbol, limit=None):
         """
         Description
@@ -621,6 +1345,7 @@ class FmpClient:
         return self._request(f'{urls.CASH_FLOW_STATEMENT_GROWTH}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_ttm_key_metrics(self, symbol, limit=None):
         """
         Description
@@ -635,6 +1360,7 @@ class FmpClient:
         return self._request(f'{urls.KEY_METRICS_TTM}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_key_metrics(self, symbol, period=None, limit=None):
         """
         Description
@@ -649,6 +1375,7 @@ class FmpClient:
         return self._request(f'{urls.KEY_METRICS}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"period": period, "limit": limit}))}')
 
+    @_frame_output
     def get_financial_growth(self, symbol, period=None, limit=None):
         """
         Description
@@ -677,6 +1404,7 @@ class FmpClient:
         """
         return self._request(f'{urls.RATING}/{symbol}')
 
+    @_frame_output
     def get_companies_historical_rating(self, symbol, limit=None):
         """
         Description
@@ -736,6 +1464,7 @@ class FmpClient:
         return self._request(f'{urls.ADVANCED_LEVERED_DISCOUNTED_CASH_FLOW}?'
                              f'{urllib.parse.urlencode(self.make_params({"symbol": symbol}))}')
 
+    @_frame_output
     def get_historical_dcf(self, symbol, period=None, limit=None):
         """
         Description
@@ -751,6 +1480,7 @@ class FmpClient:
         return self._request(f'{urls.HISTORICAL_DISCOUNTED_CASH_FLOW_STATEMENT}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"period": period, "limit": limit}))}')
 
+    @_frame_output
     def get_historical_daily_dcf(self, symbol, limit=None):
         """
         Description
@@ -768,6 +1498,7 @@ class FmpClient:
 
     ##### STOCK STATISTICS #####
 
+    @_frame_output
     def get_historical_social_sentiment(self, symbol, page):
         """
         Description
@@ -782,6 +1513,30 @@ class FmpClient:
         return self._request(f'{urls.HISTORICAL_SOCIAL_SENTIMENT}?'
                              f'{urllib.parse.urlencode(self.make_params({"symbol": symbol, "page": page}))}')
 
+    def iter_historical_social_sentiment(self, symbol, since=None, prefetch=2, start_page=0):
+        """
+        Description
+        ----
+        Iterate over the historical Social Media sentiment of all pages (time in UTC), the next pages are
+        downloaded while the current one is consumed.
+
+        Input
+        ----
+        since (string)
+            Stop at the first sentiment older than this date (formated as %Y-%m-%d or %Y-%m-%d %H:%M:%S)
+        prefetch (integer)
+            Number of pages downloaded ahead (2 by default)
+        start_page (integer)
+            First page (0 by default)
+
+        Output
+        ----
+        sentiments (iterator)
+            Iterator over the data dict of each historical Social Media sentiment
+        """
+        return self._iter_pages(lambda page: self.get_historical_social_sentiment(symbol, page, as_frame=False),
+                                'date', since=since, prefetch=prefetch, start_page=start_page)
+
     def get_trending_social_sentiment(self, type=None, source=None):
         """
         Description
@@ -820,6 +1575,7 @@ class FmpClient:
         return self._request(f'{urls.CHANGES_SOCIAL_SENTIMENT}?'
                              f'{urllib.parse.urlencode(self.make_params({"type": type, "source": source}))}')
 
+    @_frame_output
     def get_stock_grade(self, symbol, limit=None):
         """
         Description
@@ -834,6 +1590,7 @@ class FmpClient:
         return self._request(f'{urls.STOCK_GRADE}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_earning_surprises(self, symbol):
         """
         Description
@@ -847,6 +1604,7 @@ class FmpClient:
         """
         return self._request(f'{urls.EARNING_SURPRISES}/{symbol}')
 
+    @_frame_output
     def get_analyst_estimates(self, symbol, period=None, limit=None):
         """
         Description
@@ -861,6 +1619,7 @@ class FmpClient:
         return self._request(f'{urls.ANALYST_ESTIMATES}/{symbol}?'
                              f'{urllib.parse.urlencode(self.make_params({"period": period, "limit": limit}))}')
 
+    @_frame_output
     def get_merges_acquisitions_rss_feed(self, page):
         """
         Description
@@ -875,6 +1634,30 @@ class FmpClient:
         return self._request(f'{urls.MERGES_ACQUISITIONS_RSS_FEED}?'
                              f'{urllib.parse.urlencode(self.make_params({"page": page}))}')
 
+    def iter_merges_acquisitions_rss_feed(self, since=None, prefetch=2, start_page=0):
+        """
+        Description
+        ----
+        Iterate over the mergers and acquisitions rss feed of all pages, the next pages are
+        downloaded while the current one is consumed.
+
+        Input
+        ----
+        since (string)
+            Stop at the first transaction older than this date (formated as %Y-%m-%d)
+        prefetch (integer)
+            Number of pages downloaded ahead (2 by default)
+        start_page (integer)
+            First page (0 by default)
+
+        Output
+        ----
+        feeds (iterator)
+            Iterator over the data dict of each mergers and acquisitions feed
+        """
+        return self._iter_pages(lambda page: self.get_merges_acquisitions_rss_feed(page, as_frame=False),
+                                'transactionDate', since=since, prefetch=prefetch, start_page=start_page)
+
     def search_merges_acquisitions(self, name):
         """
         Description
@@ -891,6 +1674,7 @@ class FmpClient:
 
     ##### STOCK LIST #####
 
+    @_frame_output
     def get_stock_list(self):
         """
         Description
@@ -904,6 +1688,7 @@ class FmpClient:
         """
         return self._request(f'{urls.STOCK_LIST}')
 
+    @_frame_output
     def get_tradable_stock_list(self):
         """
         Description
@@ -917,6 +1702,7 @@ class FmpClient:
         """
         return self._request(f'{urls.TRADABLE_SYMBOL_LIST}')
 
+    @_frame_output
     def get_etf_list(self):
         """
         Description
@@ -930,8 +1716,49 @@ class FmpClient:
         """
         return self._request(f'{urls.ETF_LIST}')
 
+    def iter_stock_list(self):
+        """
+        Description
+        ----
+        Iterate over all companies ticker symbols available in FMP while the response is downloaded
+        (flat memory usage).
+
+        Output
+        ----
+        symbol_list (iterator)
+            Iterator over the data dict of each available stock
+        """
+        return self._iter_request(f'{urls.STOCK_LIST}')
+
+    def iter_tradable_stock_list(self):
+        """
+        Description
+        ----
+        Iterate over all tradable ticker symbols while the response is downloaded (flat memory usage).
+
+        Output
+        ----
+        symbol_list (iterator)
+            Iterator over the data dict of each tradable stock
+        """
+        return self._iter_request(f'{urls.TRADABLE_SYMBOL_LIST}')
+
+    def iter_etf_list(self):
+        """
+        Description
+        ----
+        Iterate over all ETF symbols available in FMP while the response is downloaded (flat memory usage).
+
+        Output
+        ----
+        symbol_list (iterator)
+            Iterator over the data dict of each available etf
+        """
+        return self._iter_request(f'{urls.ETF_LIST}')
+
     # STOCK LOOK UP TOOL
 
+    @_frame_output
     def search(self, input, exchange=None, limit=None):
         """
         Description
@@ -960,6 +1787,7 @@ class FmpClient:
         return self._request(f'{urls.SEARCH}?'
                              f'{urllib.parse.urlencode(self.make_params({"query": input, "echange": exchange,"limit":limit}))}')
 
+    @_frame_output
     def search_ticker(self, input, exchange=None, limit=None):
         """
         Description
@@ -988,6 +1816,7 @@ class FmpClient:
         return self._request(f'{urls.SEARCH_TICKER}?'
                              f'{urllib.parse.urlencode(self.make_params({"query": input, "echange": exchange,"limit":limit}))}')
 
+    @_frame_output
     def search_company(self, input, exchange=None, limit=None):
         """
         Description
@@ -1018,6 +1847,7 @@ class FmpClient:
 
     # STOCK SCREENER
 
+    @_frame_output
     def stock_screener(self, marketCapMoreThan=None, marketCapLowerThan=None, priceMoreThan=None, priceLowerThan=None,
                              betaMoreThan=None, betaLowerThan=None, volumeMoreThan=None, volumeLowerThan=None,
                              dividendMoreThan=None, dividendLowerThan=None, isEtf=None, isActivelyTrading=None,
@@ -1118,6 +1948,7 @@ class FmpClient:
 
     # COMPANY INFORMATION
 
+    @_frame_output
     def get_company_profile(self, symbol):
         """
         Description
@@ -1136,6 +1967,7 @@ class FmpClient:
         """
         return self._request(f'{urls.PROFILE}/{symbol}')
 
+    @_frame_output
     def get_company_key_executives(self, symbol):
         """
         Description
@@ -1172,6 +2004,7 @@ class FmpClient:
         """
         return self._request(f'{urls.MARKET_CAP}/{symbol}')
 
+    @_frame_output
     def get_historical_marketCap(self, symbol, limit=None):
         """
         Description
@@ -1245,6 +2078,7 @@ class FmpClient:
         """
         return self._request(f'{urls.IS_MARKET_OPEN}')
 
+    @_frame_output
     def get_delisted_companies(self, page=None):
         """
         Description
@@ -1264,6 +2098,31 @@ class FmpClient:
         return self._request(f'{urls.DELISTED_COMPANIES}?'
                              f'{urllib.parse.urlencode(self.make_params({"page": page}))}')
 
+    def iter_delisted_companies(self, since=None, prefetch=2, start_page=0):
+        """
+        Description
+        ----
+        Iterate over the delisted companies of all pages, the next pages are downloaded while
+        the current one is consumed.
+
+        Input
+        ----
+        since (string)
+            Stop at the first company delisted before this date (formated as %Y-%m-%d)
+        prefetch (integer)
+            Number of pages downloaded ahead (2 by default)
+        start_page (integer)
+            First page (0 by default)
+
+        Output
+        ----
+        data_dict (iterator)
+            Iterator over the data dict of each delisted company
+        """
+        return self._iter_pages(lambda page: self.get_delisted_companies(page, as_frame=False), 'delistedDate',
+                                since=since, prefetch=prefetch, start_page=start_page)
+
+    @_frame_output
     def get_symbol_changes(self):
         """
         Description
@@ -1352,6 +2211,7 @@ class FmpClient:
             return self._request(f'{urls.INDUSTRY_PRICE_EARNING_RATIO}?'
                                  f'{urllib.parse.urlencode(self.make_params({"date": date, "exchange": exchange}))}')
 
+    @_frame_output
     def get_sector_performance(self):
         """
         Description
@@ -1365,6 +2225,7 @@ class FmpClient:
         """
         return self._request(f'{urls.SECTOR_PERFORMANCE}')
 
+    @_frame_output
     def get_historical_sector_performance(self, limit=None):
         """
         Description
@@ -1379,6 +2240,7 @@ class FmpClient:
         return self._request(f'{urls.HISTORICAL_SECTOR_PERFORMANCE}?'
                              f'{urllib.parse.urlencode(self.make_params({"limit": limit}))}')
 
+    @_frame_output
     def get_most_gainers(self):
         """
         Description
@@ -1392,6 +2254,7 @@ class FmpClient:
         """
         return self._request(f'{urls.MOST_GAINER_STOCK}')
 
+    @_frame_output
     def get_most_losers(self):
         """
         Description
@@ -1405,6 +2268,7 @@ class FmpClient:
         """
         return self._request(f'{urls.MOST_LOSER_STOCK}')
 
+    @_frame_output
     def get_most_actives(self):
         """
         Description
@@ -1420,6 +2284,7 @@ class FmpClient:
 
     # ECONOMICS
 
+    @_frame_output
     def get_market_risk_premium(self):
         """
         Description
@@ -1433,6 +2298,7 @@ class FmpClient:
         """
         return self._request(f'{urls.MARKET_RISK_PREMIUM}')
 
+    @_frame_output
     def get_historical_treasury_rates(self, start=None, end=None):
         """
         Description
@@ -1461,6 +2327,7 @@ class FmpClient:
         return self._request(f'{urls.HISTORICAL_TREASURY}?'
                                  f'{urllib.parse.urlencode(self.make_params({"from": start, "to": end}))}')
 
+    @_frame_output
     def get_economic_indicators(self, source, start=None, end=None):
         """
         Description
@@ -1496,4 +2363,203 @@ class FmpClient:
                 except ValueError:
                     raise ValueError(f'{date} as a wrong date format')
         return self._request(f'{urls.ECONOMICS_INDICATOR}?'
-                                 f'{urllib.parse.urlencode(self.make_params({"name": source, "from": start, "to": end}))}')
\ No newline at end of file
+                                 f'{urllib.parse.urlencode(self.make_params({"name": source, "from": start, "to": end}))}')
+
+    # BULK ENDPOINT
+
+    def get_batch_eod_prices(self, date, chunksize=None):
+        """
+        Description
+        ----
+        Return the end of day prices of all the assets for a given date (bulk endpoint).
+
+        Input
+        ----
+        date (string)
+            Date formated as %Y-%m-%d
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            End of day prices of all the assets (or iterator of DataFrames)
+        """
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f'{date} as a wrong date format')
+        return self._get_bulk(urls.BATCH_EOD, {'date': date}, chunksize)
+
+    def get_bulk_profiles(self, chunksize=None):
+        """
+        Description
+        ----
+        Return the profile of all the companies (bulk endpoint).
+
+        Input
+        ----
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Profiles of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.PROFILE_BULK, {}, chunksize)
+
+    def get_bulk_income_statements(self, year, period='annual', chunksize=None):
+        """
+        Description
+        ----
+        Return the income statements of all the companies for a given year (bulk endpoint).
+
+        Input
+        ----
+        year (integer)
+            Fiscal year
+        period (string)
+            'annual' (default) or 'quarter'
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Income statements of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.INCOME_STATEMENT_BULK, {'year': year, 'period': period}, chunksize)
+
+    def get_bulk_balance_sheet_statements(self, year, period='annual', chunksize=None):
+        """
+        Description
+        ----
+        Return the balance sheet statements of all the companies for a given year (bulk endpoint).
+
+        Input
+        ----
+        year (integer)
+            Fiscal year
+        period (string)
+            'annual' (default) or 'quarter'
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Balance sheet statements of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.BALANCE_SHEET_STATEMENT_BULK, {'year': year, 'period': period}, chunksize)
+
+    def get_bulk_cash_flow_statements(self, year, period='annual', chunksize=None):
+        """
+        Description
+        ----
+        Return the cash flow statements of all the companies for a given year (bulk endpoint).
+
+        Input
+        ----
+        year (integer)
+            Fiscal year
+        period (string)
+            'annual' (default) or 'quarter'
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Cash flow statements of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.CASH_FLOW_STATEMENT_BULK, {'year': year, 'period': period}, chunksize)
+
+    def get_bulk_ratios(self, year, period='annual', chunksize=None):
+        """
+        Description
+        ----
+        Return the ratios of all the companies for a given year (bulk endpoint).
+
+        Input
+        ----
+        year (integer)
+            Fiscal year
+        period (string)
+            'annual' (default) or 'quarter'
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Ratios of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.RATIOS_BULK, {'year': year, 'period': period}, chunksize)
+
+    def get_bulk_key_metrics(self, year, period='annual', chunksize=None):
+        """
+        Description
+        ----
+        Return the key metrics of all the companies for a given year (bulk endpoint).
+
+        Input
+        ----
+        year (integer)
+            Fiscal year
+        period (string)
+            'annual' (default) or 'quarter'
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            Key metrics of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.KEY_METRICS_BULK, {'year': year, 'period': period}, chunksize)
+
+    def get_bulk_ratios_ttm(self, chunksize=None):
+        """
+        Description
+        ----
+        Return the TTM ratios of all the companies (bulk endpoint).
+
+        Input
+        ----
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            TTM ratios of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.RATIOS_TTM_BULK, {}, chunksize)
+
+    def get_bulk_key_metrics_ttm(self, chunksize=None):
+        """
+        Description
+        ----
+        Return the TTM key metrics of all the companies (bulk endpoint).
+
+        Input
+        ----
+        chunksize (integer)
+            When provided, return an iterator of DataFrames of chunksize rows parsed while the file is
+            downloaded instead of a single DataFrame
+
+        Output
+        ----
+        data (DataFrame)
+            TTM key metrics of all the companies (or iterator of DataFrames)
+        """
+        return self._get_bulk(urls.KEY_METRICS_TTM_BULK, {}, chunksize)
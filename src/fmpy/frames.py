@@ -0,0 +1,170 @@
+from .utils import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Low cardinality text columns stored as categorical
+CATEGORY_COLUMNS = {'symbol', 'reportedCurrency', 'currency', 'exchange', 'exchangeShortName', 'period',
+                    'country', 'sector', 'industry'}
+
+
+def is_date_column(column):
+    return column in ('date', 'fillingDate', 'acceptedDate') or column.endswith('Date')
+
+
+def infer_dtype(column, dtype):
+    """Return the schema dtype of a column from the dtype inferred by pandas"""
+    if is_date_column(column):
+        return 'datetime64[ns]'
+    elif column in CATEGORY_COLUMNS:
+        return 'category'
+    elif pd.api.types.is_bool_dtype(dtype):
+        return 'boolean'
+    elif pd.api.types.is_integer_dtype(dtype):
+        return 'Int64'
+    elif pd.api.types.is_float_dtype(dtype):
+        return 'float64'
+    return 'object'
+
+
+def infer_schema(df):
+    """
+    Description
+    ----
+    Infer the dtype of every column of a DataFrame: dates as 'datetime64[ns]', integers as 'Int64',
+    other numbers as 'float64', low cardinality text as 'category', the rest is kept as 'object'.
+
+    Output
+    ----
+    schema (dict)
+        dtype by column
+    """
+    return {column: infer_dtype(column, dtype) for column, dtype in df.dtypes.items()}
+
+
+def infer_stream_schema(df):
+    """
+    Description
+    ----
+    Infer from the first chunk of a stream (a CSV parsed by chunks) a schema that every chunk can be cast to
+    without losing values: integers are read as 'float64' since a later chunk may hold a fractional value,
+    columns without any value in the first chunk and low cardinality text are kept as 'object' (the categories
+    of a later chunk are not known yet).
+
+    Output
+    ----
+    schema (dict)
+        dtype by column
+    """
+    schema = {}
+    for column, dtype in infer_schema(df).items():
+        if df[column].isna().all() or dtype == 'category':
+            dtype = 'object'
+        schema[column] = 'float64' if dtype == 'Int64' else dtype
+    return schema
+
+
+def _to_numeric(values, dtype):
+    if dtype == 'float64':
+        try:
+            return np.array(values, dtype='float64')
+        except (TypeError, ValueError):
+            return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype('float64')
+    return pd.array(values, dtype=dtype)
+
+
+def make_column(column, values, schema):
+    """
+    Description
+    ----
+    Build a column from a list of values with the dtype of the schema. Values that cannot be converted become
+    missing values, an integer column receiving a fractional value is widened to 'float64' in the schema.
+    """
+    dtype = schema.get(column)
+    if dtype == 'datetime64[ns]':
+        return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='ISO8601')
+    elif dtype == 'category':
+        return pd.Categorical(values)
+    elif dtype in ('Int64', 'float64'):
+        try:
+            return _to_numeric(values, dtype)
+        except (TypeError, ValueError):
+            schema[column] = 'float64'
+            return _to_numeric(values, 'float64')
+    elif dtype == 'boolean':
+        try:
+            return pd.array(values, dtype='boolean')
+        except (TypeError, ValueError):
+            schema[column] = 'object'
+    # Text columns use the pandas default string storage
+    return pd.Series(values)
+
+
+def records_to_frame(records, schema):
+    """
+    Description
+    ----
+    Build a DataFrame from a list of dicts (FMP json output) with the dtypes of a cached schema.
+    Columns missing from the schema are inferred once and added to it, columns without any value are
+    kept as 'object' and inferred again next time.
+
+    Input
+    ----
+    records (list)
+        List of data dicts
+    schema (dict)
+        dtype by column, completed in place
+
+    Output
+    ----
+    data (DataFrame)
+        Typed DataFrame
+    """
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    data = {}
+    for column in columns:
+        values = [record.get(column) for record in records]
+        if column not in schema:
+            series = pd.Series(values)
+            if series.notna().any():
+                schema[column] = infer_dtype(column, series.infer_objects().dtype)
+        data[column] = make_column(column, values, schema)
+    return pd.DataFrame(data)
+
+
+def apply_schema(df, schema):
+    """
+    Description
+    ----
+    Cast the columns of a DataFrame to the dtypes of a schema. Values that cannot be converted become missing
+    values so that every chunk of the same endpoint ends up with identical dtypes.
+    """
+    for column, dtype in schema.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype == 'datetime64[ns]':
+            df[column] = pd.to_datetime(df[column], errors='coerce', format='ISO8601')
+        elif dtype in ('Int64', 'float64'):
+            values = pd.to_numeric(df[column], errors='coerce')
+            try:
+                df[column] = values.astype(dtype)
+            except TypeError:
+                # A fractional value in an integer column
+                schema[column] = 'float64'
+                df[column] = values.astype('float64')
+        elif dtype == 'boolean':
+            df[column] = df[column].astype('boolean')
+        elif dtype == 'category':
+            df[column] = df[column].astype('category')
+        elif dtype == 'object':
+            df[column] = df[column].astype(object)
+    return df
+
+
+def concat_frames(frames, schema):
+    """Concatenate DataFrames sharing a schema, categorical columns stay categorical"""
+    df = pd.concat(frames, ignore_index=True)
+    for column, dtype in schema.items():
+        if dtype == 'category' and column in df.columns and df[column].dtype != 'category':
+            df[column] = df[column].astype('category')
+    return df
@@ -0,0 +1,159 @@
+import bisect
+import threading
+from urllib.parse import urlsplit
+from . import urls
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Url paths of the fmpy.urls endpoints, longest first so that the most specific endpoint matches
+_ENDPOINT_PATHS = sorted({urlsplit(url).path for name, url in vars(urls).items()
+                          if name.isupper() and isinstance(url, str) and url.startswith(urls.BASE_URL)},
+                         key=len, reverse=True)
+
+
+def get_endpoint_template(url):
+    """Return the fmpy.urls endpoint path of an url, without the symbols and periods following it"""
+    path = urlsplit(url).path
+    for endpoint in _ENDPOINT_PATHS:
+        if path.startswith(endpoint) and path[len(endpoint):len(endpoint) + 1] in ('', '/'):
+            return endpoint
+    return 'other'
+
+
+class _EndpointMetrics:
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.shared = 0
+        self.latency_buckets = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.bytes = 0
+        self.decode_time = 0.0
+        self.retries = 0
+        self.status_codes = {}
+        self.rate_limit_wait = 0.0
+
+    def to_dict(self, buckets):
+        cumulative, counts = 0, {}
+        for bucket, count in zip(list(buckets) + ['+Inf'], self.latency_buckets):
+            cumulative += count
+            counts[bucket] = cumulative
+        return {'requests': self.requests, 'errors': self.errors, 'cache_hits': self.cache_hits,
+                'shared': self.shared, 'latency': {'buckets': counts, 'sum': self.latency_sum,
+                                                   'count': cumulative},
+                'bytes': self.bytes, 'decode_time': self.decode_time, 'retries': self.retries,
+                'status_codes': dict(self.status_codes), 'rate_limit_wait': self.rate_limit_wait}
+
+
+class ClientMetrics:
+    """
+    Description
+    ----
+    Metrics of the requests sent by a FmpClient, grouped by endpoint (fmpy.urls path without the symbols).
+    Records the number of requests, errors, cache hits and shared single-flight responses, a latency
+    histogram, the response bytes, the JSON decode time, the retries, the status codes and the
+    time spent waiting for the rate limiter.
+
+    Input
+    ----
+    buckets (tuple)
+        Upper bounds in seconds of the latency histogram buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _get(self, url):
+        endpoint = get_endpoint_template(url)
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = _EndpointMetrics(self.buckets)
+        return metrics
+
+    def record_request(self, url, status, latency, size=0, retries=0, rate_limit_wait=0.0):
+        """Record a request sent to FMP (each retry is a request), status is None when no response was received"""
+        with self._lock:
+            metrics = self._get(url)
+            metrics.requests += 1
+            if status is None or status >= 400:
+                metrics.errors += 1
+            status = status if status is not None else 'error'
+            metrics.status_codes[status] = metrics.status_codes.get(status, 0) + 1
+            metrics.latency_buckets[bisect.bisect_left(self.buckets, latency)] += 1
+            metrics.latency_sum += latency
+            metrics.bytes += size
+            metrics.retries += retries
+            metrics.rate_limit_wait += rate_limit_wait
+
+    def record_decode(self, url, seconds):
+        with self._lock:
+            self._get(url).decode_time += seconds
+
+    def record_cache_hit(self, url):
+        with self._lock:
+            self._get(url).cache_hits += 1
+
+    def record_shared(self, url):
+        with self._lock:
+            self._get(url).shared += 1
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """
+        Description
+        ----
+        Return the current metrics.
+
+        Output
+        ----
+        metrics (dict)
+            Metrics by endpoint. Latency buckets are cumulative like in Prometheus histograms
+        """
+        with self._lock:
+            return {endpoint: metrics.to_dict(self.buckets) for endpoint, metrics in sorted(self._endpoints.items())}
+
+    def to_prometheus(self, prefix='fmpy'):
+        """
+        Description
+        ----
+        Return the current metrics in the Prometheus text exposition format.
+
+        Output
+        ----
+        text (string)
+            Metrics labelled by endpoint
+        """
+        snapshot = self.snapshot()
+        counters = [('requests_total', 'requests', 'Requests sent to FMP'),
+                    ('errors_total', 'errors', 'Requests without a successful response'),
+                    ('cache_hits_total', 'cache_hits', 'Responses read from the response cache'),
+                    ('shared_total', 'shared', 'Responses shared with an identical request in flight'),
+                    ('response_bytes_total', 'bytes', 'Response bytes received'),
+                    ('decode_seconds_total', 'decode_time', 'Time spent decoding JSON responses'),
+                    ('retries_total', 'retries', 'Requests sent again after an error'),
+                    ('rate_limit_wait_seconds_total', 'rate_limit_wait', 'Time spent waiting for the rate limiter')]
+        lines = []
+        for name, key, description in counters:
+            lines += [f'# HELP {prefix}_{name} {description}', f'# TYPE {prefix}_{name} counter']
+            lines += [f'{prefix}_{name}{{endpoint="{endpoint}"}} {metrics[key]}'
+                      for endpoint, metrics in snapshot.items()]
+        name = f'{prefix}_responses_total'
+        lines += [f'# HELP {name} Responses by status code', f'# TYPE {name} counter']
+        lines += [f'{name}{{endpoint="{endpoint}",status="{status}"}} {count}'
+                  for endpoint, metrics in snapshot.items() for status, count in metrics['status_codes'].items()]
+        name = f'{prefix}_request_duration_seconds'
+        lines += [f'# HELP {name} Request latency', f'# TYPE {name} histogram']
+        for endpoint, metrics in snapshot.items():
+            lines += [f'{name}_bucket{{endpoint="{endpoint}",le="{bucket}"}} {count}'
+                      for bucket, count in metrics['latency']['buckets'].items()]
+            lines += [f'{name}_sum{{endpoint="{endpoint}"}} {metrics["latency"]["sum"]}',
+                      f'{name}_count{{endpoint="{endpoint}"}} {metrics["latency"]["count"]}']
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """
+    Description
+    ----
+    Base class of the thread-safe rate limiters used by FmpClient.
+    A limiter must implement _reserve, which returns the number of seconds the caller has to wait
+    before sending its request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _reserve(self, now):
+        raise NotImplementedError
+
+    def acquire(self):
+        """
+        Description
+        ----
+        Block until a request can be sent.
+
+        Output
+        ----
+        wait (float)
+            Number of seconds the call waited
+        """
+        with self._lock:
+            wait = max(self._reserve(time.monotonic()), 0.0)
+            self.calls += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        if wait:
+            time.sleep(wait)
+        self._local.last_wait = wait
+        return wait
+
+    def release(self):
+        """Called once the response of an acquired call is received"""
+
+    def record_response(self, status, latency=None, retry_after=None):
+        """
+        Description
+        ----
+        Called with the outcome of every request, used by the adaptive limiters.
+
+        Input
+        ----
+        status (integer)
+            HTTP status code, None when no response was received (timeout, connection error)
+        latency (float)
+            Number of seconds the request took
+        retry_after (float)
+            Number of seconds asked by the Retry-After header of the response
+        """
+
+    @property
+    def last_wait(self):
+        """Number of seconds waited by the last call of the current thread"""
+        return getattr(self._local, 'last_wait', 0.0)
+
+    def stats(self):
+        """
+        Description
+        ----
+        Return the limiter statistics.
+
+        Output
+        ----
+        stats (dict)
+            Number of calls, total, average and maximum wait (in seconds)
+        """
+        with self._lock:
+            return {'calls': self.calls, 'total_wait': self.total_wait,
+                    'average_wait': self.total_wait / self.calls if self.calls else 0.0,
+                    'max_wait': self.max_wait}
+
+
+class TokenBucketLimiter(RateLimiter):
+    """
+    Description
+    ----
+    Token bucket limiter: up to burst calls can be sent at once, then calls are paced evenly.
+    The refill rate is lowered by the burst size so that no window of period seconds ever contains
+    more than rate calls (FMP counts the calls on a sliding window).
+
+    Input
+    ----
+    rate (integer)
+        Maximum number of calls per period
+    period (float)
+        Period length in seconds (60 by default)
+    burst (integer)
+        Number of calls that can be sent without pacing (1 by default), at most rate - 1
+    """
+
+    def __init__(self, rate, period=60, burst=1):
+        super().__init__()
+        if rate <= 0 or period <= 0:
+            raise ValueError('rate and period must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.period = period
+        # A burst of the whole rate would leave nothing to refill, it is lowered so that calls are still paced
+        self.burst = max(min(burst, rate - 1), 1)
+        self._fill_rate = self._get_fill_rate(rate)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _get_fill_rate(self, rate):
+        # A rate too low to be lowered by the burst (rate_limit=1) is paced evenly, the burst is then 1
+        return (rate - self.burst) / self.period if rate > self.burst else rate / self.period
+
+    def _reserve(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._fill_rate)
+        self._updated = now
+        # A negative balance is a reservation on tokens that are not refilled yet
+        self._tokens -= 1
+        return -self._tokens / self._fill_rate if self._tokens < 0 else 0.0
+
+
+class SlidingWindowLimiter(RateLimiter):
+    """
+    Description
+    ----
+    Sliding window log limiter: a call is sent as soon as less than rate calls were sent
+    during the last period seconds.
+
+    Input
+    ----
+    rate (integer)
+        Maximum number of calls per period
+    period (float)
+        Period length in seconds (60 by default)
+    """
+
+    def __init__(self, rate, period=60):
+        super().__init__()
+        if rate <= 0 or period <= 0:
+            raise ValueError('rate and period must be positive')
+        self.rate = rate
+        self.period = period
+        self._log = deque(maxlen=rate)
+
+    def _reserve(self, now):
+        scheduled = now if len(self._log) < self.rate else max(now, self._log[0] + self.period)
+        self._log.append(scheduled)
+        return scheduled - now
+
+
+class AdaptiveLimiter(TokenBucketLimiter):
+    """
+    Description
+    ----
+    Token bucket limiter whose rate and concurrency follow the server (additive increase, multiplicative
+    decrease). A 429 (or 503) response divides the rate and the number of concurrent calls, a Retry-After header
+    holds every call for the asked time, and a latency rising well above its usual level (or a timeout) divides
+    the concurrency. While responses are healthy, the rate and concurrency are probed back up step by step.
+
+    Input
+    ----
+    rate (integer)
+        Number of calls per period to start with
+    period (float)
+        Period length in seconds (60 by default)
+    burst (integer)
+        Number of calls that can be sent without pacing (1 by default)
+    min_rate (integer)
+        Lowest rate (rate / 10 by default)
+    max_rate (integer)
+        Highest rate probed (rate by default), set it above rate to find the rate allowed by the account
+    max_concurrency (integer)
+        Highest number of calls in flight (32 by default)
+    min_concurrency (integer)
+        Lowest number of calls in flight (1 by default)
+    decrease (float)
+        Factor applied to the rate and concurrency on throttling (0.5 by default)
+    increase (float)
+        Rate added at each probe (max_rate / 20 by default)
+    probe_interval (float)
+        Minimum number of seconds between two increases, and between a decrease and the next change (1 by default)
+    latency_factor (float)
+        Latency, relative to the usual latency, above which the concurrency is decreased (3 by default)
+    """
+
+    def __init__(self, rate, period=60, burst=1, min_rate=None, max_rate=None, max_concurrency=32,
+                 min_concurrency=1, decrease=0.5, increase=None, probe_interval=1.0, latency_factor=3.0):
+        super().__init__(rate, period=period, burst=burst)
+        self.min_rate = min(max(min_rate or rate / 10, self.burst + 1), rate)
+        self.max_rate = max(max_rate or rate, rate)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease = decrease
+        self.increase = increase or self.max_rate / 20
+        self.probe_interval = probe_interval
+        self.latency_factor = latency_factor
+        self.concurrency = float(max_concurrency)
+        self.throttles = 0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._latency = None
+        self._base_latency = None
+        self._last_change = float('-inf')
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self.concurrency):
+                self._condition.wait()
+            self._in_flight += 1
+        return super().acquire()
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def _set_rate(self, rate, now):
+        # Tokens refilled at the previous rate are accounted before the rate changes
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._fill_rate)
+        self._updated = now
+        self.rate = rate
+        self._fill_rate = self._get_fill_rate(rate)
+
+    def _set_concurrency(self, concurrency):
+        with self._condition:
+            self.concurrency = min(max(concurrency, self.min_concurrency), self.max_concurrency)
+            self._condition.notify_all()
+
+    def record_response(self, status, latency=None, retry_after=None):
+        now = time.monotonic()
+        with self._lock:
+            if status in (429, 503):
+                self.throttles += 1
+                if now - self._last_change >= self.probe_interval:
+                    self._last_change = now
+                    self._set_rate(max(self.rate * self.decrease, self.min_rate), now)
+                    self._set_concurrency(self.concurrency * self.decrease)
+                if retry_after:
+                    # No token is available before the asked time, the next calls are paced from there
+                    self._set_rate(self.rate, now)
+                    self._tokens = min(self._tokens, -retry_after * self._fill_rate)
+                return
+            congested = status is None
+            if latency is not None:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                # The usual latency follows the lowest latencies, and slowly the higher ones
+                if self._base_latency is None or self._latency < self._base_latency:
+                    self._base_latency = self._latency
+                else:
+                    self._base_latency += 0.01 * (self._latency - self._base_latency)
+                congested = congested or self._latency > self.latency_factor * self._base_latency
+            if now - self._last_change < self.probe_interval:
+                return
+            if congested:
+                self._last_change = now
+                self._set_concurrency(self.concurrency * self.decrease)
+            elif status < 400:
+                self._last_change = now
+                self._set_rate(min(self.rate + self.increase, self.max_rate), now)
+                self._set_concurrency(self.concurrency + 1)
+
+    def stats(self):
+        """
+        Description
+        ----
+        Return the limiter statistics.
+
+        Output
+        ----
+        stats (dict)
+            Number of calls, total, average and maximum wait (in seconds), current rate and concurrency,
+            number of calls in flight and number of throttled responses
+        """
+        stats = super().stats()
+        with self._lock:
+            stats.update({'rate': self.rate, 'concurrency': int(self.concurrency), 'in_flight': self._in_flight,
+                          'throttles': self.throttles})
+        return stats
@@ -0,0 +1,70 @@
+from .utils import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Length in minutes of the intraday candle periods (formated as in fmpy.utils.format_period)
+PERIOD_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '1hour': 60, '4hour': 240}
+
+MINUTE = 60 * 10 ** 9
+DAY = 24 * 60 * MINUTE
+
+
+def get_source_periods(period):
+    """
+    Description
+    ----
+    Return the periods whose candles can be aggregated into candles of the given period, coarsest first.
+    Daily candles are never derived: FMP daily volumes and closes include the trades outside of the intraday
+    candles (auctions, extended hours).
+    """
+    if period not in PERIOD_MINUTES:
+        return []
+    return [source for source, minutes in sorted(PERIOD_MINUTES.items(), key=lambda item: -item[1])
+            if minutes < PERIOD_MINUTES[period] and PERIOD_MINUTES[period] % minutes == 0]
+
+
+def resample_candles(df, period, session_start=None):
+    """
+    Description
+    ----
+    Aggregate OHLCV candles into coarser candles: first Open, highest High, lowest Low, last Close and
+    summed Volume. Candles are labelled by their start time like the FMP ones, and aligned on the
+    session start (FMP hourly stock candles start at 9:30, crypto ones at 0:00). Periods without any
+    source candle (nights, week-ends) are skipped.
+
+    Input
+    ----
+    df (DataFrame)
+        Candles sorted by a datetime Date index, with Open, High, Low, Close and Volume columns
+    period (string)
+        Period of the output candles, '5min', '15min', '30min', '1hour' or '4hour'
+    session_start (string)
+        Time the candles are aligned on (for example: "09:30"). By default the earliest candle time of a day
+
+    Output
+    ----
+    data (DataFrame)
+        Resampled candles indexed by a datetime Date index
+    """
+    if period not in PERIOD_MINUTES:
+        raise ValueError(f'{period} period can not be resampled (allowed periods are {",".join(PERIOD_MINUTES)})')
+    if df.empty:
+        return df
+    step = PERIOD_MINUTES[period] * MINUTE
+    times = df.index.values.astype('datetime64[ns]').view('int64')
+    if session_start is None:
+        offset = int((times % DAY).min())
+    else:
+        offset = int(pd.Timedelta(f'{session_start}:00').value)
+    # Start time of the output candle of every source candle, computed in one pass on the int64 timestamps
+    labels = (times - offset) // step * step + offset
+    boundaries = np.flatnonzero(np.diff(labels)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(labels)]]) - 1
+    data = {'Open': df['Open'].to_numpy()[starts],
+            'High': np.maximum.reduceat(df['High'].to_numpy(), starts),
+            'Low': np.minimum.reduceat(df['Low'].to_numpy(), starts),
+            'Close': df['Close'].to_numpy()[ends],
+            'Volume': np.add.reduceat(df['Volume'].to_numpy(), starts)}
+    return pd.DataFrame(data, index=pd.DatetimeIndex(labels[starts], name=df.index.name or 'Date'))
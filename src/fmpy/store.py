@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from .utils import lazy_import
+
+pd = lazy_import('pandas')
+
+
+class CandleStore:
+    """
+    Description
+    ----
+    Local on-disk store of historical candles. Candles are saved as Parquet files partitioned by
+    symbol, period and year (path/symbol/period/year.parquet), next to a coverage file recording
+    the date ranges already downloaded. Parquet support requires pyarrow (pip install fmpy_qi[store]).
+
+    Input
+    ----
+    path (string)
+        Root directory of the store (created if it does not exist)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _get_directory(self, symbol, period):
+        return os.path.join(self.path, symbol, period)
+
+    def _get_coverage_file(self, symbol, period):
+        return os.path.join(self._get_directory(symbol, period), '_coverage.json')
+
+    def _get_year_file(self, symbol, period, year):
+        return os.path.join(self._get_directory(symbol, period), f'{year}.parquet')
+
+    def get_coverage(self, symbol, period):
+        """
+        Description
+        ----
+        Return the date ranges already downloaded for a symbol and a period.
+
+        Output
+        ----
+        coverage (list)
+            Sorted and disjoint (start, end) ranges formated as %Y-%m-%d %H:%M:%S, empty if nothing is stored
+        """
+        file = self._get_coverage_file(symbol, period)
+        if not os.path.exists(file):
+            return []
+        with open(file) as f:
+            coverage = json.load(f)
+        # Coverage files written before the ranges were recorded hold a single range
+        ranges = coverage['ranges'] if 'ranges' in coverage else [[coverage['start'], coverage['end']]]
+        return [tuple(date_range) for date_range in ranges]
+
+    def get_covering_range(self, symbol, period, start, end):
+        """Return the downloaded range containing [start, end], None if it is not fully downloaded"""
+        return next((date_range for date_range in self.get_coverage(symbol, period)
+                     if date_range[0] <= start and end <= date_range[1]), None)
+
+    def get_missing_ranges(self, symbol, period, start, end):
+        """
+        Description
+        ----
+        Return the parts of [start, end] (formated as %Y-%m-%d %H:%M:%S) that are not downloaded yet.
+
+        Output
+        ----
+        missing_ranges (list)
+            Sorted (start, end) ranges formated as %Y-%m-%d %H:%M:%S
+        """
+        missing_ranges = []
+        for range_start, range_end in self.get_coverage(symbol, period):
+            if range_end < start:
+                continue
+            if range_start > end:
+                break
+            if start < range_start:
+                missing_ranges.append((start, _shift(range_start, -1)))
+            start = _shift(range_end, 1)
+            if start > end:
+                return missing_ranges
+        return missing_ranges + [(start, end)]
+
+    def read(self, symbol, period, start, end):
+        """
+        Description
+        ----
+        Return the stored candles between start and end (formated as %Y-%m-%d %H:%M:%S).
+
+        Output
+        ----
+        data (DataFrame)
+            Candles indexed by a datetime Date index (empty if nothing is stored)
+        """
+        frames = []
+        for year in range(int(start[:4]), int(end[:4]) + 1):
+            file = self._get_year_file(symbol, period, year)
+            if os.path.exists(file):
+                frames.append(pd.read_parquet(file))
+        if not frames:
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+                                index=pd.DatetimeIndex([], name='Date'))
+        df = pd.concat(frames).set_index('Date').sort_index()
+        return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+    def write(self, symbol, period, df, start, end):
+        """
+        Description
+        ----
+        Merge candles into the store and add [start, end] to the stored coverage, ranges that overlap or
+        follow each other are merged. Stored candles with the same Date are replaced by the new ones.
+
+        Input
+        ----
+        df (DataFrame)
+            Candles indexed by a datetime Date index (None if the range has no candle)
+        start (string)
+            Start of the downloaded range (formated as %Y-%m-%d %H:%M:%S)
+        end (string)
+            End of the downloaded range (formated as %Y-%m-%d %H:%M:%S)
+        """
+        if start > end:
+            raise ValueError(f'start ({start}) is after end ({end})')
+        with self._lock:
+            os.makedirs(self._get_directory(symbol, period), exist_ok=True)
+            for year, year_df in ([] if df is None else df.groupby(df.index.year)):
+                file = self._get_year_file(symbol, period, year)
+                if os.path.exists(file):
+                    year_df = pd.concat([pd.read_parquet(file).set_index('Date'), year_df])
+                    year_df = year_df[~year_df.index.duplicated(keep='last')].sort_index()
+                self._replace(file, lambda tmp_file: year_df.reset_index().to_parquet(tmp_file, index=False))
+            ranges = []
+            for date_range in sorted(self.get_coverage(symbol, period) + [(start, end)]):
+                if ranges and date_range[0] <= _shift(ranges[-1][1], 1):
+                    ranges[-1][1] = max(ranges[-1][1], date_range[1])
+                else:
+                    ranges.append(list(date_range))
+
+            def write_coverage(tmp_file):
+                with open(tmp_file, 'w') as f:
+                    json.dump({'ranges': ranges}, f)
+
+            self._replace(self._get_coverage_file(symbol, period), write_coverage)
+
+    @staticmethod
+    def _replace(file, write):
+        # Write to a temporary file first so an interrupted write never corrupts the store
+        tmp_file = f'{file}.tmp'
+        write(tmp_file)
+        os.replace(tmp_file, file)
+
+
+def _shift(date, seconds):
+    # Move a %Y-%m-%d %H:%M:%S date by a number of seconds
+    return (datetime.strptime(date, '%Y-%m-%d %H:%M:%S') + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
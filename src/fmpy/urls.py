@@ -228,7 +228,15 @@ TRADABLE_SYMBOL_LIST = f'{API_V3_URL}/available-traded/list'
 ETF_LIST = f'{API_V3_URL}/etf/list'
 
 # BULK ENDPOINT
-#TODO
+BATCH_EOD = f'{API_V4_URL}/batch-request-end-of-day-prices'
+PROFILE_BULK = f'{API_V4_URL}/profile/all'
+INCOME_STATEMENT_BULK = f'{API_V4_URL}/income-statement-bulk'
+BALANCE_SHEET_STATEMENT_BULK = f'{API_V4_URL}/balance-sheet-statement-bulk'
+CASH_FLOW_STATEMENT_BULK = f'{API_V4_URL}/cash-flow-statement-bulk'
+RATIOS_BULK = f'{API_V4_URL}/ratios-bulk'
+RATIOS_TTM_BULK = f'{API_V4_URL}/ratios-ttm-bulk'
+KEY_METRICS_BULK = f'{API_V4_URL}/key-metrics-bulk'
+KEY_METRICS_TTM_BULK = f'{API_V4_URL}/key-metrics-ttm-bulk'
 
 # MARKET INDEXES
 ALL_INDEXES_QUOTE = f'{API_V3_URL}/quotes/index'
@@ -1,4 +1,38 @@
-from datetime import datetime
+import codecs
+import importlib
+import importlib.util
+import json
+import types
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class LazyModule(types.ModuleType):
+    """Module imported on its first attribute access"""
+
+    def __getattr__(self, name):
+        module = importlib.import_module(self.__name__)
+        # Next accesses find the module attributes directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, name)
+
+
+def get_accept_encoding():
+    """Return the Accept-Encoding header of the requests, brotli is only asked when urllib3 can decode it"""
+    encodings = ['gzip', 'deflate']
+    if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+        encodings.append('br')
+    return ', '.join(encodings)
+
+
+def lazy_import(name):
+    """Return a module imported only once it is used, pandas and numpy take most of the fmpy import time"""
+    return LazyModule(name)
 
 
 def is_valid_time_format(time_format):
@@ -19,6 +53,73 @@ def format_period(period):
     return period
 
 
+def parse_retry_after(value):
+    """Return the number of seconds of a Retry-After header (seconds or HTTP date), None when it is missing"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
 def get_current_minute():
     return datetime.now().replace(second=0, microsecond=0)
 
+
+def json_loads(content):
+    # orjson is used when installed, it decodes large FMP responses several times faster
+    return orjson.loads(content) if orjson else json.loads(content)
+
+
+def iter_json_array(chunks):
+    """Yield the items of a JSON array from an iterable of bytes chunks, as soon as each item is complete"""
+    chunks = iter(chunks)
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    started = False
+    for chunk in chunks:
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    # Not an array (an FMP error message for example), the whole body is decoded at once
+                    payload = json.loads(buffer[position:] + ''.join(text_decoder.decode(chunk) for chunk in chunks)
+                                         + text_decoder.decode(b'', final=True))
+                    raise ValueError(f'Expected a JSON array, got: {payload}')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item is not complete yet
+                break
+            if not isinstance(item, (dict, list)):
+                # A number cut by the end of the chunk is decoded as its beginning (1.5 of 1.5e3), it is only
+                # complete once the separator following it is received
+                following = end
+                while following < len(buffer) and buffer[following] in ' \t\r\n':
+                    following += 1
+                if following == len(buffer) or buffer[following] not in ',]':
+                    break
+            yield item
+            position = end
+    if buffer[position:].strip():
+        raise ValueError('Incomplete JSON array')
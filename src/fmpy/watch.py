@@ -0,0 +1,180 @@
+import queue
+import threading
+import time
+
+
+class Watch:
+    """
+    Description
+    ----
+    Subscription to the live quotes of a watchlist, returned by FmpClient.watch.
+    Changed quotes are given to the callback when there is one, otherwise they can be consumed by
+    iterating the subscription (for changes in watch) or asynchronously (async for changes in watch).
+    Each change is a dict {symbol: {'symbol': ..., 'price': ..., 'volume': ...}} of the changed quotes only.
+    """
+
+    def __init__(self, poller, symbols, interval, callback=None):
+        self.symbols = frozenset(symbol.upper() for symbol in symbols)
+        self.interval = interval
+        self.callback = callback
+        self._poller = poller
+        self._queue = queue.Queue()
+        # Guards the switch from the synchronous queue to the asynchronous one against the polling thread
+        self._queue_lock = threading.Lock()
+        self._loop = None
+        self._async_queue = None
+        self.closed = False
+
+    def _push(self, changes):
+        if self.callback is not None:
+            self.callback(changes)
+            return
+        with self._queue_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._async_queue.put_nowait, changes)
+            else:
+                self._queue.put(changes)
+
+    def get_quotes(self):
+        """
+        Description
+        ----
+        Return the latest quotes of the watched symbols.
+
+        Output
+        ----
+        quotes (dict)
+            Latest quote dict by symbol
+        """
+        return self._poller.get_quotes(self.symbols)
+
+    def close(self):
+        """Stop the subscription, the shared polling loop stops with its last subscription"""
+        if not self.closed:
+            self.closed = True
+            self._poller.unsubscribe(self)
+            if self.callback is None:
+                # Ends the iteration of the subscription
+                self._push(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            changes = self._queue.get()
+            if changes is None:
+                return
+            yield changes
+
+    def __aiter__(self):
+        # asyncio is only imported by the asynchronous iteration
+        import asyncio
+        with self._queue_lock:
+            if self._loop is None:
+                self._async_queue = asyncio.Queue()
+                # Changes pushed before the asynchronous iteration started are moved to the asynchronous queue
+                while not self._queue.empty():
+                    self._async_queue.put_nowait(self._queue.get())
+                self._loop = asyncio.get_running_loop()
+        return self
+
+    async def __anext__(self):
+        changes = await self._async_queue.get()
+        if changes is None:
+            raise StopAsyncIteration
+        return changes
+
+
+class QuotePoller:
+    """
+    Description
+    ----
+    Single polling loop shared by all the watch subscriptions of a client. The union of the watched symbols
+    is requested in batched real time quote requests at the shortest subscription interval, the latest quotes
+    are kept as (price, volume) tuples and only the changed quotes are pushed to the subscriptions.
+
+    Input
+    ----
+    fetch (callable)
+        Function requesting the real time quotes of a list of symbols and returning a list of quote dicts
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        # Reentrant since the first quotes of a subscription are pushed holding it, to a callback that may call
+        # get_quotes
+        self._lock = threading.RLock()
+        self._subscriptions = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self._quotes = {}
+        self.last_error = None
+
+    def subscribe(self, watch):
+        with self._lock:
+            # A new subscription starts with the quotes already known by the shared loop. They are pushed before
+            # the polling thread can see the subscription, so that no newer change is pushed before them
+            quotes = self.get_quotes(watch.symbols)
+            if quotes:
+                watch._push(quotes)
+            self._subscriptions.add(watch)
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name='fmpy-quote-poller',
+                                                daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, watch):
+        with self._lock:
+            self._subscriptions.discard(watch)
+            if not self._subscriptions and self._thread is not None:
+                self._stop.set()
+                self._thread = None
+
+    def get_quotes(self, symbols):
+        with self._lock:
+            return {symbol: {'symbol': symbol, 'price': self._quotes[symbol][0], 'volume': self._quotes[symbol][1]}
+                    for symbol in symbols if symbol in self._quotes}
+
+    def _run(self, stop):
+        while not stop.is_set():
+            started = time.monotonic()
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            if not subscriptions:
+                return
+            self._poll(subscriptions)
+            interval = min(watch.interval for watch in subscriptions)
+            stop.wait(max(interval - (time.monotonic() - started), 0))
+
+    def _poll(self, subscriptions):
+        symbols = sorted(set().union(*(watch.symbols for watch in subscriptions)))
+        try:
+            quotes = self._fetch(symbols)
+        except Exception as error:
+            self.last_error = error
+            return
+        changes = {}
+        with self._lock:
+            for quote in quotes or []:
+                symbol = quote['symbol'].upper()
+                row = (quote.get('price'), quote.get('volume'))
+                if self._quotes.get(symbol) != row:
+                    self._quotes[symbol] = row
+                    changes[symbol] = {'symbol': symbol, 'price': row[0], 'volume': row[1]}
+            # Subscriptions made since the request started their first quotes before these changes, the ones made
+            # from now on start with them
+            subscriptions = list(self._subscriptions)
+        if changes:
+            for watch in subscriptions:
+                watch_changes = {symbol: changes[symbol] for symbol in watch.symbols if symbol in changes}
+                if watch_changes and not watch.closed:
+                    try:
+                        watch._push(watch_changes)
+                    except Exception as error:
+                        # A failing callback must not stop the loop shared by the other subscriptions
+                        self.last_error = error
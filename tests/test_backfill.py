@@ -0,0 +1,37 @@
+import pytest
+from fmpy.backfill import backfill
+from fmpy.client import FmpClient
+from mock_server import MockFmpServer
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def server():
+    with MockFmpServer() as server:
+        yield server
+
+
+def test_gap_between_backfilled_ranges_is_downloaded(server, tmp_path):
+    for start, end in [('2024-01-01', '2024-01-31'), ('2024-03-01', '2024-03-31')]:
+        summary = backfill(['AAA'], '5m', start, end, str(tmp_path), api_key='test', base_url=server.url)
+        assert summary['symbols'] == 1 and not summary['errors']
+    client = FmpClient(api_key='test', base_url=server.url, candle_store=str(tmp_path))
+    requests = server.requests
+    df = client.get_historical_data('AAA', period='5m', start='2024-02-05', end='2024-02-10')
+    assert server.requests > requests
+    assert len(df) == 5 * 78
+
+
+def test_backfill_started_again_with_a_later_end_skips_downloaded_windows(server, tmp_path):
+    first = backfill(['AAA'], '1m', '2024-01-01', '2024-01-20', str(tmp_path), api_key='test', base_url=server.url)
+    second = backfill(['AAA'], '1m', '2024-01-01', '2024-01-21', str(tmp_path), api_key='test', base_url=server.url)
+    # 1min windows are 3 days long from 2024-01-01, only the last one (2024-01-19 to 2024-01-21) is downloaded again
+    assert first['windows'] == 7
+    assert second['skipped_windows'] == 6 and second['windows'] == 1
+    client = FmpClient(api_key='test', base_url=server.url, candle_store=str(tmp_path))
+    requests = server.requests
+    df = client.get_historical_data('AAA', period='1m', start='2024-01-01', end='2024-01-21 23:59:59')
+    assert server.requests == requests
+    # 15 sessions of 390 candles (2024-01-20 and 2024-01-21 are a week end)
+    assert len(df) == 15 * 390
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from fmpy.client import FmpClient
+from mock_server import MockFmpServer
+
+
+@pytest.fixture
+def server():
+    # Only every tenth company has a website, the first chunks have none
+    with MockFmpServer(bulk_rows=100) as server:
+        yield server
+
+
+def test_sparse_text_column_is_kept_across_chunks(server):
+    client = FmpClient(api_key='test', base_url=server.url)
+    chunks = list(client.get_bulk_profiles(chunksize=5))
+    assert len(chunks) == 20
+    assert chunks[0]['website'].isna().all()
+    # Every chunk has the same dtypes
+    assert len({tuple(chunk.dtypes.astype(str)) for chunk in chunks}) == 1
+    websites = pd.concat(chunks)['website'].dropna()
+    assert list(websites) == [f'https://www.s{i:04d}.com' for i in range(9, 100, 10)]
+
+
+def test_chunked_and_whole_bulk_responses_hold_the_same_values(server):
+    client = FmpClient(api_key='test', base_url=server.url)
+    # The whole response is parsed by chunks too when it is longer than BULK_CHUNKSIZE rows
+    client.BULK_CHUNKSIZE = 5
+    df = client.get_bulk_profiles()
+    chunks = pd.concat(client.get_bulk_profiles(chunksize=7), ignore_index=True)
+    assert df['website'].notna().sum() == 10
+    pd.testing.assert_frame_equal(df.astype({'symbol': object, 'exchange': object}), chunks, check_dtype=False)
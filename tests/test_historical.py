@@ -0,0 +1,65 @@
+import threading
+import pytest
+from fmpy import utils
+from fmpy.client import FmpClient
+from mock_server import MockFmpServer, make_candles
+
+
+@pytest.fixture
+def server():
+    with MockFmpServer() as server:
+        yield server
+
+
+@pytest.fixture
+def capped_server():
+    with MockFmpServer(max_rows=1000) as server:
+        yield server
+
+
+@pytest.mark.parametrize('period, formated_period', [('1m', '1min'), ('5m', '5min')])
+def test_parallel_mode_requests_the_rest_of_truncated_windows(capped_server, period, formated_period):
+    client = FmpClient(api_key='test', base_url=capped_server.url)
+    client.HISTORICAL_MAX_ROWS = dict.fromkeys(FmpClient.HISTORICAL_MAX_ROWS, 1000)
+    df = client.get_historical_data('AAA', period=period, start='2024-01-01', end='2024-03-01', mode='parallel')
+    # The end date is its midnight, no intraday candle of 2024-03-01 is requested
+    expected = make_candles('AAA', formated_period, '2024-01-01', '2024-02-29')
+    assert len(df) == len(expected)
+    assert df.index[0] == expected[-1]['date']
+    assert df.index[-1] == expected[0]['date']
+
+
+@pytest.mark.parametrize('period, start, end, windows', [('1m', '2024-01-01', '2024-01-10', 4),
+                                                          ('1h', '2024-01-01', '2024-03-01', 1),
+                                                          ('1d', '2020-01-01', '2024-03-01', 1)])
+def test_parallel_mode_sends_one_request_by_window_that_is_not_truncated(server, period, start, end, windows):
+    client = FmpClient(api_key='test', base_url=server.url)
+    assert len(client._plan_historical_windows(utils.format_period(period), start, end)) == windows
+    df = client.get_historical_data('AAA', period=period, start=start, end=end, mode='parallel')
+    assert len(df) > 0
+    assert server.requests == windows
+
+
+def test_many_symbols_in_parallel_mode_stay_within_the_connection_pool(server):
+    client = FmpClient(api_key='test', base_url=server.url, pool_maxsize=4)
+    in_flight, peak, lock = [0], [0], threading.Lock()
+    send = client._send_attempt
+
+    def counting_send(*args, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        try:
+            return send(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    client._send_attempt = counting_send
+    symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+    df, errors = client.get_historical_data_many(symbols, period='1m', start='2024-01-01', end='2024-01-20',
+                                                 max_workers=2, long_format=True, mode='parallel')
+    assert not errors
+    assert list(df.index.get_level_values('Symbol').unique()) == symbols
+    assert len(df) == 4 * len(make_candles('AAA', '1min', '2024-01-01', '2024-01-19'))
+    assert peak[0] <= 4
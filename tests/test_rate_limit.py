@@ -0,0 +1,117 @@
+import threading
+import time
+import pytest
+from fmpy.client import FmpClient
+from fmpy.rate_limit import AdaptiveLimiter, SlidingWindowLimiter, TokenBucketLimiter
+
+
+def call_times(limiter, calls):
+    times = []
+    for _ in range(calls):
+        limiter.acquire()
+        times.append(time.monotonic())
+    return times
+
+
+def max_calls_in_window(times, period):
+    return max(sum(1 for other in times if time_ <= other < time_ + period) for time_ in times)
+
+
+def test_token_bucket_sends_the_burst_then_paces_the_calls():
+    limiter = TokenBucketLimiter(10, period=0.5, burst=5)
+    started = time.monotonic()
+    times = call_times(limiter, 15)
+    assert times[4] - started < 0.05
+    # The 10 calls following the burst are paced at (10 - 5) calls per 0.5 second
+    assert times[-1] - started == pytest.approx(1.0, abs=0.1)
+    # A small tolerance for the sleep precision
+    assert max_calls_in_window(times, 0.5 - 0.02) <= 10
+    stats = limiter.stats()
+    assert stats['calls'] == 15 and stats['max_wait'] > 0
+
+
+def test_sliding_window_never_exceeds_the_rate():
+    limiter = SlidingWindowLimiter(5, period=0.3)
+    times = call_times(limiter, 12)
+    assert max_calls_in_window(times, 0.3 - 0.02) <= 5
+
+
+def test_burst_is_lowered_below_the_rate():
+    assert TokenBucketLimiter(3, burst=10).burst == 2
+    limiter = FmpClient(api_key='test', rate_limit=1).rate_limiter
+    assert limiter.burst == 1
+    # Calls are paced evenly, one per minute
+    assert limiter.acquire() == 0
+    assert limiter._reserve(time.monotonic()) == pytest.approx(60, abs=0.1)
+
+
+@pytest.mark.parametrize('kwargs', [{'rate': 0}, {'rate': 10, 'period': 0}, {'rate': 10, 'burst': 0}])
+def test_invalid_limits_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(**kwargs)
+
+
+def test_adaptive_limiter_backs_off_on_throttling():
+    limiter = AdaptiveLimiter(600, period=60, burst=10, max_concurrency=8, probe_interval=0)
+    limiter.record_response(429)
+    assert (limiter.rate, limiter.concurrency) == (300, 4)
+    for _ in range(10):
+        limiter.record_response(503)
+    assert limiter.rate == limiter.min_rate == 60
+    assert limiter.concurrency == limiter.min_concurrency == 1
+    assert limiter.stats()['throttles'] == 11
+
+
+def test_adaptive_limiter_decreases_once_by_probe_interval():
+    limiter = AdaptiveLimiter(600, period=60, burst=10, max_concurrency=8, probe_interval=60)
+    for _ in range(5):
+        limiter.record_response(429)
+    assert (limiter.rate, limiter.concurrency) == (300, 4)
+
+
+def test_adaptive_limiter_holds_calls_for_retry_after():
+    limiter = AdaptiveLimiter(10 ** 6, period=60, burst=10, probe_interval=0)
+    limiter.record_response(429, retry_after=0.3)
+    assert limiter.acquire() == pytest.approx(0.3, abs=0.05)
+    limiter.release()
+
+
+def test_adaptive_limiter_probes_up_to_its_maximum_while_healthy():
+    limiter = AdaptiveLimiter(600, period=60, burst=10, max_rate=1200, max_concurrency=8, probe_interval=0)
+    limiter.record_response(429)
+    for _ in range(100):
+        limiter.record_response(200, latency=0.01)
+    assert (limiter.rate, limiter.concurrency) == (1200, 8)
+
+
+def test_adaptive_limiter_lowers_concurrency_when_latency_rises():
+    limiter = AdaptiveLimiter(600, period=60, burst=10, max_concurrency=8, probe_interval=0)
+    for _ in range(20):
+        limiter.record_response(200, latency=0.01)
+    for _ in range(5):
+        limiter.record_response(200, latency=1.0)
+    assert limiter.concurrency < 8
+    assert limiter.rate == 600
+    concurrency = limiter.concurrency
+    limiter.record_response(None, latency=5.0)
+    assert limiter.concurrency < concurrency or limiter.concurrency == 1
+
+
+def test_adaptive_limiter_caps_the_calls_in_flight():
+    limiter = AdaptiveLimiter(10 ** 6, period=60, burst=10, max_concurrency=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.1)
+    limiter.release()
+    assert acquired.wait(1)
+    limiter.release()
+    thread.join()
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_client_builds_an_adaptive_limiter_probing_above_rate_limit():
+    limiter = FmpClient(api_key='test', rate_limit=300, rate_limiter='adaptive', pool_maxsize=4).rate_limiter
+    assert isinstance(limiter, AdaptiveLimiter)
+    assert (limiter.rate, limiter.max_rate, limiter.max_concurrency) == (300, 600, 4)
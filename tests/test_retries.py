@@ -0,0 +1,101 @@
+import time
+import pytest
+import requests
+from fmpy.client import FmpClient
+from fmpy.rate_limit import TokenBucketLimiter
+from mock_server import MockFmpServer
+
+
+class FailingServer(MockFmpServer):
+    """Mock server answering the first requests with the given error statuses"""
+
+    def __init__(self, statuses, **kwargs):
+        super().__init__(**kwargs)
+        self.statuses = list(statuses)
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            status = self.statuses.pop(0) if self.statuses else None
+        return 0.0, status
+
+
+class CountingLimiter(TokenBucketLimiter):
+
+    def __init__(self):
+        super().__init__(10 ** 6, burst=10 ** 5)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return super().acquire()
+
+
+def make_client(server, request_retry=5):
+    client = FmpClient(api_key='test', base_url=server.url, request_retry=request_retry, cache=False,
+                       rate_limiter=CountingLimiter())
+    client.RETRY_BACKOFF = 0.01
+    return client
+
+
+def test_every_attempt_goes_through_the_rate_limiter():
+    with FailingServer([503, 500, 429]) as server:
+        client = make_client(server)
+        assert client.get_symbol_info('AAPL')[0]['symbol'] == 'AAPL'
+    assert server.requests == 4
+    assert client.rate_limiter.acquired == 4
+    stats = client.retry_stats()
+    assert stats.pop('backoff_time') > 0
+    assert stats == {'requests': 1, 'attempts': 4, 'retries': 3, 'failures': 0,
+                     'retried_statuses': {503: 1, 500: 1, 429: 1}}
+    assert sum(endpoint['requests'] for endpoint in client.metrics.snapshot().values()) == 4
+
+
+def test_retry_after_is_honoured():
+    with FailingServer([429], retry_after=1) as server:
+        client = make_client(server)
+        started = time.monotonic()
+        client.get_symbol_info('AAPL')
+        assert time.monotonic() - started >= 1
+    assert client.retry_stats()['backoff_time'] >= 1
+    assert server.requests == 2
+
+
+def test_retry_after_longer_than_the_maximum_back_off_is_not_waited():
+    with FailingServer([429], retry_after=3600) as server:
+        client = make_client(server)
+        with pytest.raises(requests.HTTPError):
+            client.get_symbol_info('AAPL')
+    assert server.requests == 1
+    assert client.retry_stats()['failures'] == 1
+
+
+def test_failure_after_the_last_retry_is_counted():
+    with FailingServer([500] * 10) as server:
+        client = make_client(server, request_retry=2)
+        with pytest.raises(requests.HTTPError):
+            client.get_symbol_info('AAPL')
+    assert server.requests == 3
+    stats = client.retry_stats()
+    assert (stats['requests'], stats['attempts'], stats['retries'], stats['failures']) == (1, 3, 2, 1)
+    assert stats['retried_statuses'] == {500: 2}
+
+
+def test_client_errors_are_not_retried():
+    with FailingServer([404]) as server:
+        client = make_client(server)
+        with pytest.raises(requests.HTTPError):
+            client.get_symbol_info('AAPL')
+    assert server.requests == 1
+    assert client.retry_stats()['retries'] == 0
+
+
+def test_connection_errors_are_retried():
+    with MockFmpServer() as server:
+        url = server.url
+    client = FmpClient(api_key='test', base_url=url, request_retry=2, rate_limiter=CountingLimiter())
+    client.RETRY_BACKOFF = 0.01
+    with pytest.raises(requests.ConnectionError):
+        client.get_symbol_info('AAPL')
+    assert client.rate_limiter.acquired == 3
+    assert client.retry_stats()['retried_statuses'] == {'error': 2}
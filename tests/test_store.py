@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+import pytest
+from fmpy.client import FmpClient
+from fmpy.store import CandleStore
+from mock_server import MockFmpServer
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def server():
+    with MockFmpServer() as server:
+        yield server
+
+
+def test_coverage_keeps_ranges_that_do_not_touch(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('AAA', '5min', None, '2024-01-01 00:00:00', '2024-01-31 23:59:59')
+    store.write('AAA', '5min', None, '2024-03-01 00:00:00', '2024-03-31 23:59:59')
+    assert store.get_coverage('AAA', '5min') == [('2024-01-01 00:00:00', '2024-01-31 23:59:59'),
+                                                 ('2024-03-01 00:00:00', '2024-03-31 23:59:59')]
+    assert store.get_missing_ranges('AAA', '5min', '2024-01-15 00:00:00', '2024-04-10 00:00:00') == \
+        [('2024-02-01 00:00:00', '2024-02-29 23:59:59'), ('2024-04-01 00:00:00', '2024-04-10 00:00:00')]
+    store.write('AAA', '5min', None, '2024-02-01 00:00:00', '2024-02-29 23:59:59')
+    assert store.get_coverage('AAA', '5min') == [('2024-01-01 00:00:00', '2024-03-31 23:59:59')]
+    assert store.get_missing_ranges('AAA', '5min', '2024-01-15 00:00:00', '2024-03-10 00:00:00') == []
+
+
+def test_gap_between_stored_ranges_is_downloaded(server, tmp_path):
+    client = FmpClient(api_key='test', base_url=server.url, candle_store=str(tmp_path))
+    client.get_historical_data('AAA', period='5m', start='2024-01-01', end='2024-01-31 23:59:59')
+    client.get_historical_data('AAA', period='5m', start='2024-03-01', end='2024-03-31 23:59:59')
+    requests = server.requests
+    df = client.get_historical_data('AAA', period='5m', start='2024-02-05', end='2024-02-10')
+    assert server.requests > requests
+    # 2024-02-05 to 2024-02-09 are 5 sessions of 78 candles
+    assert len(df) == 5 * 78
+
+
+def test_write_rejects_an_inverted_range(tmp_path):
+    store = CandleStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.write('AAA', '5min', None, '2024-02-01 00:00:00', '2024-01-01 00:00:00')
+    assert store.get_coverage('AAA', '5min') == []
+
+
+def test_future_range_is_not_recorded(server, tmp_path):
+    client = FmpClient(api_key='test', base_url=server.url, candle_store=str(tmp_path))
+    start = (datetime.now() + timedelta(days=10)).strftime('%Y-%m-%d')
+    end = (datetime.now() + timedelta(days=20)).strftime('%Y-%m-%d')
+    assert client.get_historical_data('AAA', period='5m', start=start, end=end) is None
+    assert client.candle_store.get_coverage('AAA', '5min') == []
+    assert server.requests == 0
@@ -0,0 +1,45 @@
+import json
+import random
+import pytest
+from fmpy.utils import iter_json_array
+
+ITEMS = [{'symbol': 'AAPL', 'price': 189.5, 'name': 'Apple Inc.'}, 1.5e3, -2, 0.25, 12345678901234, 'text',
+         'café – 日本', True, False, None, [1, [2, {'a': 'b'}]], {}, [], -1.25e-7, '', 'a,b]c']
+
+
+def split(body, rng):
+    # Split a body into chunks of random sizes, multi-byte characters included
+    chunks, position = [], 0
+    while position < len(body):
+        size = rng.randint(1, 8)
+        chunks.append(body[position:position + size])
+        position += size
+    return chunks
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_items_are_decoded_whatever_the_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    body = json.dumps(ITEMS, indent=rng.choice([None, 1])).encode()
+    assert list(iter_json_array(split(body, rng))) == ITEMS
+
+
+@pytest.mark.parametrize('chunks', [[b'[1.5e', b'3, 2]'], [b'[1', b'2', b'3]'], [b'[-', b'1]'], [b'[1]']])
+def test_numbers_cut_by_a_chunk_boundary(chunks):
+    expected = json.loads(b''.join(chunks))
+    assert list(iter_json_array(chunks)) == expected
+
+
+def test_empty_array():
+    assert list(iter_json_array([b' [', b' ] '])) == []
+
+
+def test_error_message_is_not_an_array():
+    with pytest.raises(ValueError, match='Expected a JSON array'):
+        list(iter_json_array([b'{"Error Message": ', b'"Invalid API KEY."}']))
+
+
+@pytest.mark.parametrize('chunks', [[b'[1, 2'], [b'[{"a": 1}, {"b"'], [b'[1.5x]']])
+def test_incomplete_array(chunks):
+    with pytest.raises(ValueError, match='Incomplete JSON array'):
+        list(iter_json_array(chunks))
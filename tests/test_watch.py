@@ -0,0 +1,34 @@
+import threading
+import time
+from fmpy.watch import QuotePoller, Watch
+
+
+def test_subscription_made_during_a_poll_gets_its_changes():
+    fetching = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(symbols):
+        calls.append(symbols)
+        if len(calls) == 2:
+            # The second poll is held while a new subscription is made
+            fetching.set()
+            release.wait(5)
+        return [{'symbol': symbol, 'price': min(len(calls) - 1, 1), 'volume': 1} for symbol in symbols]
+
+    poller = QuotePoller(fetch)
+    keeper = Watch(poller, ['AAA'], 0.0, callback=lambda changes: None)
+    poller.subscribe(keeper)
+    assert fetching.wait(5)
+    received = []
+    watch = Watch(poller, ['AAA'], 0.0, callback=received.append)
+    poller.subscribe(watch)
+    # Its first quotes are the ones known before the held poll
+    assert [changes['AAA']['price'] for changes in received] == [0]
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(received) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    watch.close()
+    keeper.close()
+    assert [changes['AAA']['price'] for changes in received] == [0, 1]